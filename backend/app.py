@@ -1,14 +1,24 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import requests
 import time
+START_TIME = time.monotonic()
+
+from flask import Flask, request, jsonify, g, has_request_context
+from flask_cors import CORS
 import os
 from dotenv import load_dotenv
 import tempfile
 import uuid
 from werkzeug.utils import secure_filename
 import logging
-import google.generativeai as genai
+import threading
+import math
+import gzip
+import hashlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from local_engine import enhance_locally, extractive_summary, run_local
+from language_id import detect_language, is_in_language, normalize_language
+from prompts import compact_transcript, build_prompt, baseline_prompt, add_references, estimate_tokens
+from translation_memory import TranslationMemory, split_segments, join_segments, parse_numbered_segments
 
 # Load environment variables
 load_dotenv()
@@ -34,11 +44,142 @@ headers = {
 
 # Gemini AI configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-else:
+if not GEMINI_API_KEY:
     logger.warning("GEMINI_API_KEY not found in environment variables")
 
+# Heavy SDKs are imported on first use to keep cold starts fast
+_genai = None
+_http_session = None
+_lazy_import_lock = threading.Lock()
+
+def get_genai():
+    """Import and configure the Gemini SDK on first use"""
+    global _genai
+    if _genai is None:
+        with _lazy_import_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                if GEMINI_API_KEY:
+                    genai.configure(api_key=GEMINI_API_KEY)
+                _genai = genai
+    return _genai
+
+def get_http_session():
+    """Return the shared HTTP session with pooled connections, creating it on first use"""
+    global _http_session
+    if _http_session is None:
+        with _lazy_import_lock:
+            if _http_session is None:
+                import requests
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update(headers)
+                _http_session = session
+    return _http_session
+
+# Prompt compaction totals, reported by /api-status
+prompt_metrics = {'prompts': 0, 'tokens_sent': 0, 'tokens_saved': 0}
+prompt_metrics_lock = threading.Lock()
+
+def record_prompt_savings(baseline, prompt):
+    """Count tokens saved by compaction against the uncompacted baseline prompt;
+    a baseline of None records a prompt that was sent without compaction"""
+    sent = estimate_tokens(prompt)
+    saved = 0 if baseline is None else estimate_tokens(baseline) - sent
+    with prompt_metrics_lock:
+        prompt_metrics['prompts'] += 1
+        prompt_metrics['tokens_sent'] += sent
+        prompt_metrics['tokens_saved'] += saved
+    if has_request_context():
+        g.prompt_tokens_saved = g.get('prompt_tokens_saved', 0) + saved
+    logger.info(f"Prompt ~{sent} tokens ({saved} saved by compaction)")
+
+# Translation memory totals, reported separately from compaction by /api-status
+translation_memory_metrics = {'tokens_saved': 0}
+
+def record_translation_memory_savings(segments):
+    """Count tokens of sentences left out of translation prompts because they were
+    reused from translation memory or already in the target language"""
+    saved = sum(estimate_tokens(segment.strip()) for segment in segments)
+    with prompt_metrics_lock:
+        translation_memory_metrics['tokens_saved'] += saved
+    if has_request_context():
+        g.translation_memory_tokens_saved = g.get('translation_memory_tokens_saved', 0) + saved
+
+# Response compression; brotli is used when the optional Brotli package is installed
+COMPRESSION_MIN_BYTES = 1024
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Recent transcript results, retrievable with GET /results/<result_id>
+RESULT_TTL = int(os.getenv('RESULT_TTL', '900'))  # Seconds a result stays retrievable
+RESULT_STORE_SIZE = 500
+result_store = OrderedDict()  # result_id -> (stored_at, payload)
+result_store_lock = threading.Lock()
+
+def save_result(payload):
+    """Store a result for later retrieval and return its id"""
+    result_id = uuid.uuid4().hex
+    now = time.monotonic()
+    with result_store_lock:
+        result_store[result_id] = (now, payload)
+        while result_store and (
+            len(result_store) > RESULT_STORE_SIZE
+            or now - next(iter(result_store.values()))[0] > RESULT_TTL
+        ):
+            result_store.popitem(last=False)
+    return result_id
+
+def get_result(result_id):
+    with result_store_lock:
+        entry = result_store.get(result_id)
+    if entry is None or time.monotonic() - entry[0] > RESULT_TTL:
+        return None
+    return entry[1]
+
+def requested_fields(data=None):
+    """Fields the client asked for with fields=a,b (query string, form or JSON body), or None for all"""
+    fields = request.args.get('fields') or request.form.get('fields') or (data or {}).get('fields')
+    if fields is None or fields == '' or fields == []:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    if not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+        raise InvalidRequestError('fields must be a comma-separated string or a list of field names')
+    return {field.strip() for field in fields if field.strip()}
+
+def requested_enhancements(fields):
+    """Enhancement fields to compute for the requested fields, in the order they are produced"""
+    return [field for field in ('structured_text', 'expressive_text', 'summary') if fields is None or field in fields]
+
+def select_fields(payload, fields):
+    """Keep only the requested fields, plus status, ids, errors and fallback flags"""
+    if fields is None:
+        return payload
+    return {
+        key: value for key, value in payload.items()
+        if key in fields or key in ('success', 'error', 'result_id') or key.endswith(('_error', '_fallback'))
+    }
+
+# Cold start timings, reported by /ready
+startup_metrics = {
+    'import_seconds': None,
+    'warmup_seconds': None,
+    'first_response_seconds': None
+}
+app_ready = threading.Event()
+
+# Serve enhancements and summaries from the local engine without calling Gemini
+LOCAL_FIRST = os.getenv('LOCAL_FIRST', 'false').lower() == 'true'
+
+# Sentence-level translation memory shared by all requests
+TRANSLATION_MEMORY_SIZE = int(os.getenv('TRANSLATION_MEMORY_SIZE', '5000'))  # Max segments kept per language
+translation_memory = TranslationMemory(max_entries=TRANSLATION_MEMORY_SIZE)
+
 # Available models in order of preference (updated for newer API)
 GEMINI_MODELS = [
     'gemini-2.5-flash',
@@ -46,11 +187,22 @@ GEMINI_MODELS = [
     'gemini-pro'
 ]
 
+_gemini_models = {}
+
+def get_gemini_model(model_name):
+    """Return a cached Gemini model client"""
+    model = _gemini_models.get(model_name)
+    if model is None:
+        model = _gemini_models[model_name] = get_genai().GenerativeModel(model_name)
+    return model
+
 def get_available_model():
     """Get the first available Gemini model"""
     for model_name in GEMINI_MODELS:
+        if gemini_breakers[model_name].state == 'open':
+            continue
         try:
-            model = genai.GenerativeModel(model_name)
+            model = get_gemini_model(model_name)
             return model, model_name
         except Exception as e:
             logger.debug(f"Model {model_name} not available: {str(e)}")
@@ -58,27 +210,500 @@ def get_available_model():
     
     # Fallback to basic model
     try:
-        model = genai.GenerativeModel('gemini-2.5-flash')
+        model = get_gemini_model('gemini-2.5-flash')
         return model, 'gemini-2.5-flash'
     except Exception as e:
         logger.error(f"No Gemini models available: {str(e)}")
         raise e
 
+# Circuit breaking and hedging across GEMINI_MODELS
+GEMINI_REQUEST_TIMEOUT = float(os.getenv('GEMINI_REQUEST_TIMEOUT', '30'))  # Seconds before a model call is abandoned
+GEMINI_HEDGING = os.getenv('GEMINI_HEDGING', 'false').lower() == 'true'
+GEMINI_HEDGE_DEFAULT_DELAY = 3.0  # Used until a model has enough latency samples for a p95
+GEMINI_HEDGE_MIN_DELAY = 0.5
+GEMINI_HEDGE_MAX_DELAY = 8.0
+GEMINI_BREAKER_WINDOW = 20  # Recent calls tracked per model
+GEMINI_BREAKER_MIN_CALLS = 5
+GEMINI_BREAKER_ERROR_RATE = 0.5  # Error rate that opens the circuit
+GEMINI_BREAKER_COOLDOWN = 30  # Seconds an open circuit waits before a trial call
+GEMINI_NOT_FOUND_COOLDOWN = 600  # Missing models stay open much longer
+
+class GeminiUnavailableError(Exception):
+    """Raised when every Gemini model's circuit is open"""
+    code = 503
+
+class CircuitBreaker:
+    """Track recent error rate and latency of one model and stop calling it while it is failing"""
+
+    def __init__(self, name):
+        self.name = name
+        self.state = 'closed'
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=GEMINI_BREAKER_WINDOW)  # (succeeded, latency seconds)
+        self._opened_at = 0.0
+        self._cooldown = GEMINI_BREAKER_COOLDOWN
+        self._trial_in_flight = False
+
+    def allow(self):
+        """Whether a call may be sent now; an open circuit lets one trial call through after its cooldown"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self._cooldown:
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record(self, succeeded, latency, status=None):
+        with self._lock:
+            self._calls.append((succeeded, latency))
+            if self.state == 'half_open':
+                if succeeded:
+                    logger.info(f"Circuit for {self.name} closed")
+                    self.state = 'closed'
+                    self._calls.clear()
+                else:
+                    self._open(status)
+                return
+
+            if succeeded or self.state == 'open':
+                return
+            failures = sum(1 for ok, _ in self._calls if not ok)
+            if status == 404 or (
+                len(self._calls) >= GEMINI_BREAKER_MIN_CALLS
+                and failures / len(self._calls) >= GEMINI_BREAKER_ERROR_RATE
+            ):
+                self._open(status)
+
+    def release(self):
+        """Free the trial slot after a call that says nothing about the model's health"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _open(self, status):
+        self.state = 'open'
+        self._opened_at = time.monotonic()
+        self._cooldown = GEMINI_NOT_FOUND_COOLDOWN if status == 404 else GEMINI_BREAKER_COOLDOWN
+        logger.warning(f"Circuit for {self.name} opened for {self._cooldown}s")
+
+    def p95_latency(self):
+        with self._lock:
+            latencies = sorted(latency for ok, latency in self._calls if ok)
+        if len(latencies) < GEMINI_BREAKER_MIN_CALLS:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def snapshot(self):
+        with self._lock:
+            calls = list(self._calls)
+        p95 = self.p95_latency()
+        return {
+            'state': self.state,
+            'recent_calls': len(calls),
+            'error_rate': round(sum(1 for ok, _ in calls if not ok) / len(calls), 2) if calls else 0.0,
+            'p95_latency': round(p95, 3) if p95 is not None else None
+        }
+
+gemini_breakers = {model_name: CircuitBreaker(model_name) for model_name in GEMINI_MODELS}
+gemini_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='gemini')
+
+def gemini_error_status(error):
+    """Status code of a Gemini error (404 missing model, 429 quota, 503 unavailable) or None"""
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return int(code)
+    message = str(error).lower()
+    if "404" in message and "model" in message:
+        return 404
+    if "429" in message or "quota" in message:
+        return 429
+    return None
+
+def is_transient_gemini_error(error):
+    """Whether an error means the model is unhealthy (quota, server error, timeout or missing model).
+
+    Blocked content and other 4xx errors would fail the same way on every model.
+    """
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = gemini_error_status(error)
+    if status is not None:
+        return status in (404, 408, 429) or status >= 500
+    message = str(error).lower()
+    return 'timed out' in message or 'deadline exceeded' in message
+
+def _generate_with_model(model_name, prompt):
+    """Run one model call and record its outcome on the model's circuit breaker"""
+    started = time.monotonic()
+    try:
+        response = get_gemini_model(model_name).generate_content(
+            prompt, request_options={'timeout': GEMINI_REQUEST_TIMEOUT}
+        )
+        text = response.text
+    except Exception as e:
+        if is_transient_gemini_error(e):
+            gemini_breakers[model_name].record(False, time.monotonic() - started, gemini_error_status(e))
+        else:
+            gemini_breakers[model_name].release()
+        raise
+    gemini_breakers[model_name].record(True, time.monotonic() - started)
+    return text
+
+def _next_gemini_model(tried):
+    for model_name in GEMINI_MODELS:
+        if model_name not in tried and gemini_breakers[model_name].allow():
+            tried.append(model_name)
+            return model_name
+    return None
+
+def _hedge_delay(model_name):
+    p95 = gemini_breakers[model_name].p95_latency()
+    if p95 is None:
+        return GEMINI_HEDGE_DEFAULT_DELAY
+    return min(max(p95, GEMINI_HEDGE_MIN_DELAY), GEMINI_HEDGE_MAX_DELAY)
+
+def call_gemini(prompt):
+    """Generate content on the first healthy model, failing over on transient errors and optionally hedging slow calls.
+
+    A hedge goes to a different model, which has its own quota, so it doesn't pass
+    through rate_limit_gemini again.
+    """
+    tried = []
+    pending = {}
+    last_error = None
+    hedged = False
+
+    model_name = _next_gemini_model(tried)
+    if model_name is None:
+        raise GeminiUnavailableError("All Gemini models are temporarily unavailable")
+    logger.info(f"Using model: {model_name}")
+    pending[gemini_executor.submit(_generate_with_model, model_name, prompt)] = model_name
+
+    while pending:
+        timeout = _hedge_delay(model_name) if GEMINI_HEDGING and not hedged else None
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+        if not done:
+            hedged = True
+            hedge_model = _next_gemini_model(tried)
+            if hedge_model:
+                logger.info(f"{model_name} slower than {timeout:.2f}s, hedging with {hedge_model}")
+                pending[gemini_executor.submit(_generate_with_model, hedge_model, prompt)] = hedge_model
+            continue
+
+        for future in done:
+            finished_model = pending.pop(future)
+            try:
+                text = future.result()
+            except Exception as e:
+                if not is_transient_gemini_error(e):
+                    # Content and request errors would fail the same way on every model
+                    raise
+                last_error = e
+                logger.warning(f"{finished_model} failed: {str(e)[:200]}")
+                # Fail over straight away instead of sleeping and retrying the same model
+                next_model = _next_gemini_model(tried)
+                if next_model:
+                    logger.info(f"Failing over to {next_model}")
+                    pending[gemini_executor.submit(_generate_with_model, next_model, prompt)] = next_model
+                continue
+            if finished_model != model_name:
+                logger.info(f"Answer served by {finished_model}")
+            return text
+
+    raise last_error
+
 # Rate limiting for Gemini API
-from datetime import datetime, timedelta
-last_gemini_call = None
 GEMINI_CALL_INTERVAL = 2  # Minimum 2 seconds between calls
 
+# Priority classes sharing the Gemini quota, highest priority first
+GEMINI_PRIORITIES = ['live', 'interactive', 'batch']
+GEMINI_PRIORITY_WEIGHTS = {'live': 8, 'interactive': 3, 'batch': 1}  # Weighted fair share of call slots
+GEMINI_MAX_QUEUE_DEPTH = {'live': 8, 'interactive': 6, 'batch': 4}  # Queued calls ahead before returning 429
+LIVE_UPDATE_DEADLINE = float(os.getenv('LIVE_UPDATE_DEADLINE', '10'))  # Seconds before a queued live update is stale
+LIVE_SESSION_TTL = 600  # Seconds a live session's update counter is kept after its last update
+
+class GeminiBusyError(Exception):
+    """Raised when a Gemini call is rejected or dropped by the scheduler"""
+
+    def __init__(self, message, status_code=429, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class GeminiScheduler:
+    """Weighted fair queueing of Gemini call slots across priority classes"""
+
+    class _Ticket:
+        def __init__(self, priority, deadline, session):
+            self.priority = priority
+            self.deadline = deadline
+            self.session = session
+            self.tag = 0.0
+            self.granted = False
+            self.dropped = None
+
+    def __init__(self, interval, weights):
+        self.interval = interval
+        self.weights = weights
+        self._cond = threading.Condition()
+        self._queues = {priority: deque() for priority in weights}
+        self._finish_tags = {priority: 0.0 for priority in weights}
+        self._virtual_time = 0.0
+        self._next_slot = 0.0
+        self._sessions = OrderedDict()  # session -> (generation, last update), least recently updated first
+        self.granted = {priority: 0 for priority in weights}
+        self.dropped = {priority: 0 for priority in weights}
+
+    def start_session_update(self, session_id):
+        """Register a new update for a live session, making its older queued updates stale"""
+        now = time.monotonic()
+        with self._cond:
+            generation = self._sessions.pop(session_id, (0, now))[0] + 1
+            self._sessions[session_id] = (generation, now)
+            # Live pages create a new session on every load, so forget sessions that went quiet
+            while self._sessions and now - next(iter(self._sessions.values()))[1] > LIVE_SESSION_TTL:
+                self._sessions.popitem(last=False)
+            self._cond.notify_all()
+            return session_id, generation
+
+    def depth_ahead(self, priority):
+        """Number of queued calls in this priority class or any higher one"""
+        rank = GEMINI_PRIORITIES.index(priority)
+        with self._cond:
+            return sum(len(self._queues[p]) for p in GEMINI_PRIORITIES[:rank + 1])
+
+    def session_count(self):
+        with self._cond:
+            return len(self._sessions)
+
+    def queue_depths(self):
+        with self._cond:
+            return {priority: len(queue) for priority, queue in self._queues.items()}
+
+    def acquire(self, priority, deadline=None, session=None):
+        """Block until this caller is granted a call slot, or raise GeminiBusyError if dropped"""
+        ticket = GeminiScheduler._Ticket(priority, deadline, session)
+        with self._cond:
+            start = max(self._virtual_time, self._finish_tags[priority])
+            ticket.tag = start + 1.0 / self.weights[priority]
+            self._finish_tags[priority] = ticket.tag
+            self._queues[priority].append(ticket)
+
+            while True:
+                self._dispatch()
+                if ticket.granted:
+                    return
+                if ticket.dropped:
+                    raise GeminiBusyError(ticket.dropped, status_code=409)
+
+                wait = max(self._next_slot - time.monotonic(), 0.01)
+                if ticket.deadline is not None:
+                    wait = min(wait, max(ticket.deadline - time.monotonic(), 0.01))
+                self._cond.wait(wait)
+
+    def _is_stale(self, ticket, now):
+        if ticket.deadline is not None and now >= ticket.deadline:
+            return 'Live update expired before a Gemini slot was available'
+        if ticket.session is not None:
+            session_id, generation = ticket.session
+            if self._sessions.get(session_id, (0, None))[0] > generation:
+                return 'Live update superseded by a newer update from the same session'
+        return None
+
+    def _dispatch(self):
+        """Drop stale tickets and grant the next free slot to the lowest finish tag"""
+        now = time.monotonic()
+        for priority, queue in self._queues.items():
+            for ticket in list(queue):
+                reason = self._is_stale(ticket, now)
+                if reason:
+                    queue.remove(ticket)
+                    ticket.dropped = reason
+                    self.dropped[priority] += 1
+                    self._cond.notify_all()
+
+        if now < self._next_slot:
+            return
+
+        heads = [queue[0] for queue in self._queues.values() if queue]
+        if not heads:
+            return
+
+        ticket = min(heads, key=lambda t: (t.tag, GEMINI_PRIORITIES.index(t.priority)))
+        self._queues[ticket.priority].popleft()
+        ticket.granted = True
+        self.granted[ticket.priority] += 1
+        self._virtual_time = ticket.tag - 1.0 / self.weights[ticket.priority]
+        self._next_slot = now + self.interval
+        self._cond.notify_all()
+
+gemini_scheduler = GeminiScheduler(GEMINI_CALL_INTERVAL, GEMINI_PRIORITY_WEIGHTS)
+
+class InvalidRequestError(ValueError):
+    """Raised for malformed request parameters; endpoints answer it with a 400"""
+
+def invalid_request_response(error):
+    return jsonify({
+        'success': False,
+        'error': str(error)
+    }), 400
+
+def parse_deadline(data):
+    """Seconds from the client's deadline_ms, or None when it wasn't given"""
+    deadline_ms = (data or {}).get('deadline_ms')
+    if deadline_ms is None or deadline_ms == '':
+        return None
+    try:
+        seconds = float(deadline_ms) / 1000
+    except (TypeError, ValueError):
+        seconds = None
+    if isinstance(deadline_ms, bool) or seconds is None or not math.isfinite(seconds) or seconds <= 0:
+        raise InvalidRequestError('deadline_ms must be a positive number of milliseconds')
+    return seconds
+
+def request_priority(default, data=None):
+    """Resolve the request's priority class; clients may lower it but never raise it above the endpoint default"""
+    requested = request.headers.get('X-Priority') or (data or {}).get('priority') or request.form.get('priority')
+    requested = str(requested or default).lower()
+    if requested not in GEMINI_PRIORITIES:
+        return default
+    return max(requested, default, key=GEMINI_PRIORITIES.index)
+
+def gemini_enhancement_calls(count):
+    """Gemini calls needed for count enhancements or summaries; none when the local engine serves them"""
+    return 0 if LOCAL_FIRST else count
+
+def begin_gemini_request(priority, calls, data=None):
+    """Apply queue-depth admission control and record the scheduling context for this request"""
+    deadline = parse_deadline(data)
+    g.gemini_priority = priority
+    g.gemini_deadline = None
+    g.gemini_session = None
+    if not calls:
+        # Nothing will reach Gemini, so neither the queue nor live deadlines apply
+        return
+    
+    depth = gemini_scheduler.depth_ahead(priority)
+    if depth + calls > GEMINI_MAX_QUEUE_DEPTH[priority]:
+        retry_after = math.ceil((depth + calls) * GEMINI_CALL_INTERVAL)
+        logger.warning(f"Rejecting {priority} request: {depth} Gemini calls queued ahead")
+        raise GeminiBusyError(
+            f'Server busy: {depth} AI requests queued, please retry later',
+            retry_after=retry_after
+        )
+
+    if priority == 'live':
+        g.gemini_deadline = time.monotonic() + (deadline if deadline is not None else LIVE_UPDATE_DEADLINE)
+        session_id = (data or {}).get('session_id')
+        if session_id:
+            # Updates only supersede earlier ones sent to the same endpoint
+            g.gemini_session = gemini_scheduler.start_session_update(f"{request.endpoint}:{session_id}")
+
+def gemini_busy_response(error):
+    """Build the JSON response for a rejected or dropped Gemini request"""
+    response = jsonify({
+        'success': False,
+        'error': str(error),
+        'stale': error.status_code == 409
+    })
+    response.status_code = error.status_code
+    if error.retry_after is not None:
+        response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
 def rate_limit_gemini():
-    """Implement rate limiting for Gemini API calls"""
-    global last_gemini_call
-    if last_gemini_call:
-        time_since_last = datetime.now() - last_gemini_call
-        if time_since_last.total_seconds() < GEMINI_CALL_INTERVAL:
-            sleep_time = GEMINI_CALL_INTERVAL - time_since_last.total_seconds()
-            logger.info(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
-    last_gemini_call = datetime.now()
+    """Wait for a Gemini call slot according to the current request's priority class"""
+    if has_request_context() and 'gemini_priority' in g:
+        gemini_scheduler.acquire(g.gemini_priority, g.gemini_deadline, g.gemini_session)
+    else:
+        gemini_scheduler.acquire('interactive')
+
+# Request coalescing for identical concurrent Gemini calls
+GEMINI_SINGLEFLIGHT_TIMEOUT = float(os.getenv('GEMINI_SINGLEFLIGHT_TIMEOUT', '60'))  # Max seconds a follower waits
+
+class SingleFlight:
+    """Share one pending call among all concurrent callers using the same key"""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+            self.waiters = 0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn, timeout=None):
+        """Run fn once per key; concurrent callers with the same key wait for that result"""
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = SingleFlight._Call()
+                else:
+                    call.waiters += 1
+                    self.coalesced += 1
+
+            if leader:
+                try:
+                    call.result = fn()
+                except Exception as e:
+                    call.error = e
+                finally:
+                    with self._lock:
+                        self._calls.pop(key, None)
+                    call.done.set()
+            else:
+                logger.info(f"Coalescing with in-flight Gemini call ({call.waiters} waiting)")
+                if not call.done.wait(timeout):
+                    raise TimeoutError(f"Timed out after {timeout}s waiting for in-flight Gemini call")
+
+            if call.error is not None:
+                # A scheduler rejection reflects the leader's own priority, deadline and session,
+                # so followers make the call again under their own request instead
+                if not leader and isinstance(call.error, GeminiBusyError):
+                    logger.info("Coalesced Gemini call was rejected for its leader, retrying")
+                    continue
+                raise call.error
+            # Each caller gets its own copy so responses can be modified independently
+            return dict(call.result) if isinstance(call.result, dict) else call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+gemini_singleflight = SingleFlight()
+
+def coalesce_gemini_call(key, fn):
+    """Run a Gemini helper through the singleflight layer, turning follower timeouts into error results.
+
+    Calls only coalesce within a priority class, so a live request never waits behind the queue
+    position of a batch call, and a follower stops waiting at its own live update deadline.
+    """
+    priority, deadline = 'interactive', None
+    if has_request_context() and 'gemini_priority' in g:
+        priority, deadline = g.gemini_priority, g.gemini_deadline
+    timeout = GEMINI_SINGLEFLIGHT_TIMEOUT
+    if deadline is not None:
+        timeout = min(timeout, max(deadline - time.monotonic(), 0.0))
+    try:
+        return gemini_singleflight.do((priority,) + key, fn, timeout=timeout)
+    except TimeoutError as e:
+        if deadline is not None and time.monotonic() >= deadline:
+            raise GeminiBusyError('Live update expired while waiting for an identical in-flight call', status_code=409)
+        logger.error(str(e))
+        return {
+            'success': False,
+            'error': str(e)
+        }
 
 def allowed_file(filename):
     """Check if the uploaded file has an allowed extension"""
@@ -88,9 +713,8 @@ def upload_file_to_assemblyai(file_path):
     """Upload a local file to AssemblyAI and return the upload URL"""
     try:
         with open(file_path, "rb") as f:
-            response = requests.post(
+            response = get_http_session().post(
                 f"{ASSEMBLYAI_BASE_URL}/v2/upload",
-                headers=headers,
                 data=f
             )
         
@@ -110,10 +734,9 @@ def transcribe_audio(audio_url):
             "speech_model": "universal"
         }
         
-        response = requests.post(
+        response = get_http_session().post(
             f"{ASSEMBLYAI_BASE_URL}/v2/transcript", 
-            json=data, 
-            headers=headers
+            json=data
         )
         
         if response.status_code != 200:
@@ -124,7 +747,7 @@ def transcribe_audio(audio_url):
         
         # Poll for results
         while True:
-            transcription_result = requests.get(polling_endpoint, headers=headers).json()
+            transcription_result = get_http_session().get(polling_endpoint).json()
             
             if transcription_result['status'] == 'completed':
                 return {
@@ -146,8 +769,26 @@ def transcribe_audio(audio_url):
             'error': str(e)
         }
 
-def enhance_text_with_gemini(text, enhancement_type="structure", retry_count=0):
+def enhance_text_with_gemini(text, enhancement_type="structure", words=None):
+    """Enhance text using Gemini AI, sharing the call with identical concurrent requests"""
+    if LOCAL_FIRST:
+        # Local work uses no quota, so it isn't coalesced or held to live deadlines
+        return _enhance_text_with_gemini(text, enhancement_type, words)
+    return coalesce_gemini_call(
+        ('enhance', enhancement_type, text),
+        lambda: _enhance_text_with_gemini(text, enhancement_type, words)
+    )
+
+def _enhance_text_with_gemini(text, enhancement_type="structure", words=None):
     """Enhance text using Gemini AI for proper structure, punctuation, and semantics"""
+    if LOCAL_FIRST:
+        return {
+            'success': True,
+            'enhanced_text': basic_text_enhancement(text, enhancement_type, words),
+            'original_text': text,
+            'local_engine': True
+        }
+    
     if not GEMINI_API_KEY:
         logger.warning("Gemini API key not available, returning original text")
         return {
@@ -156,6 +797,10 @@ def enhance_text_with_gemini(text, enhancement_type="structure", retry_count=0):
             'original_text': text
         }
     
+    # Drop fillers and stutters first so more real content fits under the limit
+    raw_text = text
+    text = compact_transcript(text)
+    
     # Limit text length to avoid quota issues
     if len(text) > 2000:
         text = text[:2000] + "..."
@@ -165,66 +810,59 @@ def enhance_text_with_gemini(text, enhancement_type="structure", retry_count=0):
         # Apply rate limiting
         rate_limit_gemini()
         
-        # Get available model
-        model, model_name = get_available_model()
-        logger.info(f"Using model: {model_name}")
+        task = enhancement_type if enhancement_type in ("structure", "expressions") else "readability"
+        prompt = build_prompt(task, text)
+        record_prompt_savings(baseline_prompt(task, raw_text[:2000]), prompt)
         
-        # Shorter, more efficient prompts
-        if enhancement_type == "structure":
-            prompt = f"Fix punctuation, capitalization, and grammar in this text. Keep it concise:\n\n{text}"
-        
-        elif enhancement_type == "expressions":
-            prompt = f"Add appropriate emotions and tone to this text. Keep it natural:\n\n{text}"
-        
-        else:  # Default to structure
-            prompt = f"Improve punctuation and readability:\n\n{text}"
-        
-        response = model.generate_content(prompt)
+        response_text = call_gemini(prompt)
         
         return {
             'success': True,
-            'enhanced_text': response.text.strip(),
-            'original_text': text
+            'enhanced_text': response_text.strip(),
+            'original_text': raw_text
         }
         
+    except GeminiBusyError:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error enhancing text with Gemini: {error_msg}")
+        status = gemini_error_status(e)
         
         # Handle model not found errors
-        if "404" in error_msg and "model" in error_msg.lower():
+        if status == 404:
             logger.error(f"Model not found error: {error_msg}")
             return {
                 'success': True,
-                'enhanced_text': basic_text_enhancement(text, enhancement_type),
-                'original_text': text,
+                'enhanced_text': basic_text_enhancement(raw_text, enhancement_type, words),
+                'original_text': raw_text,
                 'fallback_used': True,
                 'error': 'AI model not available, using basic enhancement'
             }
         
-        # Handle quota exceeded errors with retry logic
-        elif "429" in error_msg or "quota" in error_msg.lower():
-            if retry_count < 2:  # Max 2 retries
-                wait_time = 2 ** retry_count  # Exponential backoff: 1s, 2s, 4s
-                logger.info(f"Quota exceeded, retrying in {wait_time} seconds... (attempt {retry_count + 1}/3)")
-                time.sleep(wait_time)
-                return enhance_text_with_gemini(text, enhancement_type, retry_count + 1)
-            else:
-                # Provide graceful fallback
-                return {
-                    'success': True,
-                    'enhanced_text': basic_text_enhancement(text, enhancement_type),
-                    'original_text': text,
-                    'fallback_used': True
-                }
+        # Every model is out of quota or unavailable; call_gemini already failed over
+        elif status in (429, 503):
+            return {
+                'success': True,
+                'enhanced_text': basic_text_enhancement(raw_text, enhancement_type, words),
+                'original_text': raw_text,
+                'fallback_used': True
+            }
         
         return {
             'success': False,
             'error': error_msg,
-            'original_text': text
+            'original_text': raw_text
         }
 
-def translate_text_with_gemini(text, target_language, retry_count=0):
+def translate_text_with_gemini(text, target_language):
+    """Translate text using Gemini AI, sharing the call with identical concurrent requests"""
+    return coalesce_gemini_call(
+        ('translate', target_language.lower(), text),
+        lambda: _translate_text_with_gemini(text, target_language)
+    )
+
+def _translate_text_with_gemini(text, target_language):
     """Translate text to target language using Gemini AI"""
     if not GEMINI_API_KEY:
         logger.warning("Gemini API key not available, cannot translate")
@@ -244,103 +882,177 @@ def translate_text_with_gemini(text, target_language, retry_count=0):
             'skipped': True
         }
     
+    # Translation input is never compacted: its fillers may be real words in the source language
+    raw_text = text
+    
     # Limit text length for translation
     if len(text) > 1800:
         text = text[:1800] + "..."
         logger.info("Text truncated to 1800 characters for translation")
     
+    # Text already in the target language doesn't need a model call
+    target = normalize_language(target_language)
+    detected_language, confidence = detect_language(raw_text)
+    if is_in_language(raw_text, target):
+        logger.info(f"Text already in {target} (confidence {confidence}), skipping translation")
+        return {
+            'success': True,
+            'translated_text': raw_text,
+            'original_text': raw_text,
+            'target_language': target_language,
+            'detected_language': detected_language,
+            'skipped': True
+        }
+    
+    # Reuse stored translations and only send unmatched sentences to the model;
+    # in mixed-language text, sentences already in the target language are kept as they are
+    segments = split_segments(text)
+    translations = []
+    kept_segments = 0
+    for segment in segments:
+        if not segment.strip():
+            translations.append(segment)
+        elif is_in_language(segment, target):
+            translations.append(segment)
+            kept_segments += 1
+        else:
+            translations.append(translation_memory.lookup(segment, target_language))
+    missing = [i for i, translation in enumerate(translations) if translation is None]
+    unsent = [segment for segment, translation in zip(segments, translations) if translation is not None and segment.strip()]
+    # Similar earlier sentences are never reused as they are, only offered to the model for consistent wording
+    references = []
+    for i in missing:
+        reference = translation_memory.similar(segments[i], target_language)
+        if reference is not None and reference not in references:
+            references.append(reference)
+    memory_stats = {
+        'reused_segments': sum(1 for segment in segments if segment.strip()) - kept_segments - len(missing),
+        'translated_segments': len(missing),
+        'reference_translations': len(references)
+    }
+    
+    if not missing:
+        logger.info(f"Translation served from memory ({len(segments)} segments)")
+        record_translation_memory_savings(unsent)
+        return {
+            'success': True,
+            'translated_text': join_segments(segments, translations),
+            'original_text': raw_text,
+            'target_language': target_language,
+            'detected_language': detected_language,
+            'translation_memory': memory_stats,
+            'kept_segments': kept_segments
+        }
+    
     try:
         # Apply rate limiting
         rate_limit_gemini()
         
-        # Get available model
-        model, model_name = get_available_model()
-        logger.info(f"Using model for translation: {model_name}")
+        logger.info(f"Translating {len(missing)}/{len(segments)} segments")
         
-        # Translation prompt
-        prompt = f"Translate the following text to {target_language}. Maintain the original meaning and tone. Only return the translation, no additional commentary:\n\n{text}"
+        if len(missing) == 1:
+            prompt = add_references(build_prompt('translate', segments[missing[0]].strip(), language=target_language), references)
+            record_prompt_savings(None, prompt)
+            new_translations = [call_gemini(prompt).strip()]
+        else:
+            numbered = "\n".join(f"{number}. {segments[i].strip()}" for number, i in enumerate(missing, 1))
+            prompt = add_references(build_prompt('translate_numbered', numbered, language=target_language), references)
+            record_prompt_savings(None, prompt)
+            new_translations = parse_numbered_segments(call_gemini(prompt), len(missing))
+        
+        if new_translations is None:
+            # Segments didn't come back one per line; translate the whole text without storing it.
+            # This finishes the call the request was admitted for, so it doesn't queue again:
+            # a live update must not turn stale after one model call has already been spent on it
+            logger.warning("Could not align segment translations, translating full text")
+            prompt = build_prompt('translate', text, language=target_language)
+            record_prompt_savings(None, prompt)
+            return {
+                'success': True,
+                'translated_text': call_gemini(prompt).strip(),
+                'original_text': raw_text,
+                'target_language': target_language,
+                'detected_language': detected_language
+            }
         
-        response = model.generate_content(prompt)
+        for i, translation in zip(missing, new_translations):
+            translations[i] = translation
+            translation_memory.store(segments[i], translation, target_language)
+        record_translation_memory_savings(unsent)
         
         return {
             'success': True,
-            'translated_text': response.text.strip(),
-            'original_text': text,
-            'target_language': target_language
+            'translated_text': join_segments(segments, translations),
+            'original_text': raw_text,
+            'target_language': target_language,
+            'detected_language': detected_language,
+            'translation_memory': memory_stats,
+            'kept_segments': kept_segments
         }
         
+    except GeminiBusyError:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error translating text with Gemini: {error_msg}")
+        status = gemini_error_status(e)
         
         # Handle model not found errors
-        if "404" in error_msg and "model" in error_msg.lower():
+        if status == 404:
             logger.error(f"Model not found for translation: {error_msg}")
             return {
                 'success': True,
-                'translated_text': text + f" [Translation to {target_language} not available]",
-                'original_text': text,
+                'translated_text': raw_text + f" [Translation to {target_language} not available]",
+                'original_text': raw_text,
                 'target_language': target_language,
                 'fallback_used': True,
                 'error': 'AI model not available for translation'
             }
         
-        # Handle quota exceeded errors with retry logic
-        elif "429" in error_msg or "quota" in error_msg.lower():
-            if retry_count < 2:  # Max 2 retries
-                wait_time = 2 ** retry_count  # Exponential backoff
-                logger.info(f"Quota exceeded for translation, retrying in {wait_time} seconds... (attempt {retry_count + 1}/3)")
-                time.sleep(wait_time)
-                return translate_text_with_gemini(text, target_language, retry_count + 1)
-            else:
-                # Provide fallback
-                return {
-                    'success': True,
-                    'translated_text': text + f" [Translation to {target_language} failed due to API limits]",
-                    'original_text': text,
-                    'target_language': target_language,
-                    'fallback_used': True
-                }
+        # Every model is out of quota or unavailable; call_gemini already failed over
+        elif status in (429, 503):
+            return {
+                'success': True,
+                'translated_text': raw_text + f" [Translation to {target_language} failed due to API limits]",
+                'original_text': raw_text,
+                'target_language': target_language,
+                'fallback_used': True
+            }
         
         return {
             'success': False,
             'error': error_msg,
-            'original_text': text,
+            'original_text': raw_text,
             'target_language': target_language
         }
 
-def basic_text_enhancement(text, enhancement_type):
-    """Basic text enhancement fallback when Gemini API is unavailable"""
-    import re
-    
-    if enhancement_type == "structure":
-        # Basic punctuation and capitalization fixes
-        text = text.strip()
-        # Add periods at the end of sentences
-        text = re.sub(r'([a-zA-Z])\s+([A-Z])', r'\1. \2', text)
-        # Capitalize first letter
-        text = text[0].upper() + text[1:] if text else text
-        # Add period at the end if missing
-        if text and not text.endswith(('.', '!', '?')):
-            text += '.'
-        return text
-    
-    elif enhancement_type == "expressions":
-        # Add basic expression indicators
-        text = text.strip()
-        # Simple emotion detection and enhancement
-        if any(word in text.lower() for word in ['good', 'great', 'excellent', 'amazing']):
-            text = text + " (positive tone)"
-        elif any(word in text.lower() for word in ['bad', 'terrible', 'awful', 'problem']):
-            text = text + " (concerned tone)"
-        return text
-    
-    else:
-        # Default: basic cleanup
-        return text.strip().capitalize()
+def basic_text_enhancement(text, enhancement_type, words=None):
+    """Local text enhancement fallback when Gemini API is unavailable"""
+    return run_local(enhance_locally, text, enhancement_type, words)
 
-def summarize_text_with_gemini(text, retry_count=0):
+def basic_summary(text):
+    """Local extractive summary fallback when Gemini API is unavailable"""
+    return run_local(extractive_summary, text)
+
+def summarize_text_with_gemini(text):
+    """Summarize text using Gemini AI, sharing the call with identical concurrent requests"""
+    if LOCAL_FIRST:
+        # Local work uses no quota, so it isn't coalesced or held to live deadlines
+        return _summarize_text_with_gemini(text)
+    return coalesce_gemini_call(
+        ('summarize', text),
+        lambda: _summarize_text_with_gemini(text)
+    )
+
+def _summarize_text_with_gemini(text):
     """Generate a concise summary of the transcribed text using Gemini AI"""
+    if LOCAL_FIRST:
+        return {
+            'success': True,
+            'summary': basic_summary(text),
+            'local_engine': True
+        }
+    
     if not GEMINI_API_KEY:
         logger.warning("Gemini API key not available, cannot generate summary")
         return {
@@ -348,6 +1060,9 @@ def summarize_text_with_gemini(text, retry_count=0):
             'error': 'Gemini API key not configured'
         }
     
+    raw_text = text
+    text = compact_transcript(text)
+    
     # Limit text length for summary
     if len(text) > 1500:
         text = text[:1500] + "..."
@@ -357,71 +1072,161 @@ def summarize_text_with_gemini(text, retry_count=0):
         # Apply rate limiting
         rate_limit_gemini()
         
-        # Get available model
-        model, model_name = get_available_model()
-        logger.info(f"Using model for summary: {model_name}")
+        prompt = build_prompt('summary', text)
+        record_prompt_savings(baseline_prompt('summary', raw_text[:1500]), prompt)
         
-        # Shorter prompt
-        prompt = f"Summarize this text in 2-3 sentences, highlighting key points:\n\n{text}"
-        
-        response = model.generate_content(prompt)
+        response_text = call_gemini(prompt)
         
         return {
             'success': True,
-            'summary': response.text.strip()
+            'summary': response_text.strip()
         }
         
+    except GeminiBusyError:
+        raise
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error generating summary with Gemini: {error_msg}")
+        status = gemini_error_status(e)
         
         # Handle model not found errors
-        if "404" in error_msg and "model" in error_msg.lower():
+        if status == 404:
             logger.error(f"Model not found for summary: {error_msg}")
-            words = text.split()
-            if len(words) > 50:
-                summary = ' '.join(words[:50]) + "... [AI summary not available, showing excerpt]"
-            else:
-                summary = text + " [AI summary not available]"
-            
             return {
                 'success': True,
-                'summary': summary,
+                'summary': basic_summary(raw_text),
                 'fallback_used': True,
                 'error': 'AI model not available for summary'
             }
         
-        # Handle quota exceeded errors with retry logic
-        elif "429" in error_msg or "quota" in error_msg.lower():
-            if retry_count < 2:  # Max 2 retries
-                wait_time = 2 ** retry_count  # Exponential backoff
-                logger.info(f"Quota exceeded for summary, retrying in {wait_time} seconds... (attempt {retry_count + 1}/3)")
-                time.sleep(wait_time)
-                return summarize_text_with_gemini(text, retry_count + 1)
-            else:
-                # Provide basic fallback summary
-                words = text.split()
-                if len(words) > 50:
-                    summary = ' '.join(words[:50]) + "... [Summary generation failed due to API limits]"
-                else:
-                    summary = text + " [Summary generation failed due to API limits]"
-                
-                return {
-                    'success': True,
-                    'summary': summary,
-                    'fallback_used': True
-                }
+        # Every model is out of quota or unavailable; call_gemini already failed over
+        elif status in (429, 503):
+            return {
+                'success': True,
+                'summary': basic_summary(raw_text),
+                'fallback_used': True
+            }
         
         return {
             'success': False,
             'error': error_msg
         }
 
+GEMINI_WARMUP_TIMEOUT = 10  # Seconds each warmup call to Gemini may take
+
+def resolve_gemini_model():
+    """Look up the first reachable Gemini model over the network and open the connection generation uses"""
+    genai = get_genai()
+    for model_name in GEMINI_MODELS:
+        try:
+            genai.get_model(f"models/{model_name}", request_options={'timeout': GEMINI_WARMUP_TIMEOUT})
+            # Token counting goes through the same client as generate_content and uses no generation quota
+            get_gemini_model(model_name).count_tokens("warm up", request_options={'timeout': GEMINI_WARMUP_TIMEOUT})
+            return model_name
+        except Exception as e:
+            logger.warning(f"Warmup could not resolve {model_name}: {str(e)[:200]}")
+            if gemini_error_status(e) == 404:
+                gemini_breakers[model_name].record(False, 0.0, 404)
+    return None
+
+def warmup():
+    """Import SDKs, resolve the Gemini model and open pooled connections, then mark the server ready"""
+    started = time.monotonic()
+    try:
+        if GEMINI_API_KEY:
+            model_name = resolve_gemini_model()
+            logger.info(f"Warmup resolved Gemini model: {model_name}")
+        
+        session = get_http_session()
+        if ASSEMBLYAI_API_KEY:
+            session.head(ASSEMBLYAI_BASE_URL, timeout=5)
+        
+        # Start the local engine workers so the first fallback doesn't pay for process spawn,
+        # and load NumPy for translation memory lookups
+        run_local(enhance_locally, "warm up", "structure")
+        translation_memory.similar("warm up the translation memory", "english")
+    except Exception as e:
+        logger.warning(f"Warmup incomplete: {str(e)}")
+    
+    startup_metrics['warmup_seconds'] = round(time.monotonic() - started, 3)
+    app_ready.set()
+    logger.info(f"Warmup finished in {startup_metrics['warmup_seconds']}s")
+
+def start_warmup():
+    """Run warmup in the background so the process can accept liveness checks meanwhile"""
+    threading.Thread(target=warmup, name='warmup', daemon=True).start()
+
+@app.after_request
+def record_first_response(response):
+    """Record the time from process start to the first response served"""
+    if startup_metrics['first_response_seconds'] is None:
+        startup_metrics['first_response_seconds'] = round(time.monotonic() - START_TIME, 3)
+        logger.info(f"First response after {startup_metrics['first_response_seconds']}s")
+    return response
+
+@app.after_request
+def finalize_json_response(response):
+    """Add an ETag to JSON responses, answer matching conditional GETs with 304, and compress large bodies"""
+    if response.status_code != 200 or response.direct_passthrough or response.mimetype != 'application/json':
+        return response
+    
+    body = response.get_data()
+    response.set_etag(hashlib.sha1(body).hexdigest(), weak=True)
+    if request.method in ('GET', 'HEAD') and request.if_none_match.contains_weak(response.get_etag()[0]):
+        response.status_code = 304
+        response.set_data(b'')
+        return response
+    
+    if len(body) < COMPRESSION_MIN_BYTES or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    if brotli is not None and request.accept_encodings['br']:
+        response.set_data(brotli.compress(body, quality=5))
+        response.headers['Content-Encoding'] = 'br'
+    elif request.accept_encodings['gzip']:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+@app.after_request
+def report_prompt_savings(response):
+    """Expose the tokens saved by prompt compaction and by translation memory for this request"""
+    if 'prompt_tokens_saved' in g:
+        response.headers['X-Prompt-Tokens-Saved'] = str(g.prompt_tokens_saved)
+    if 'translation_memory_tokens_saved' in g:
+        response.headers['X-Translation-Memory-Tokens-Saved'] = str(g.translation_memory_tokens_saved)
+    return response
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'message': 'Flask transcription server is running'})
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: 503 until warmup has finished"""
+    if not app_ready.is_set():
+        return jsonify({'status': 'warming up', 'startup': startup_metrics}), 503
+    return jsonify({'status': 'ready', 'startup': startup_metrics})
+
+@app.route('/results/<result_id>', methods=['GET'])
+def get_result_endpoint(result_id):
+    """Retrieve a stored transcript result; supports If-None-Match and fields="""
+    payload = get_result(result_id)
+    if payload is None:
+        return jsonify({
+            'success': False,
+            'error': 'Result not found or expired'
+        }), 404
+    
+    try:
+        fields = requested_fields()
+    except InvalidRequestError as e:
+        return invalid_request_response(e)
+    response = jsonify(select_fields(payload, fields))
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
 @app.route('/api-status', methods=['GET'])
 def api_status():
     """Check API status and provide information about quota limits"""
@@ -445,7 +1250,19 @@ def api_status():
             'status': gemini_status,
             'model': gemini_model,
             'available_models': GEMINI_MODELS,
+            'hedging': GEMINI_HEDGING,
+            'circuit_breakers': {name: breaker.snapshot() for name, breaker in gemini_breakers.items()},
+            'local_first': LOCAL_FIRST,
+            'translation_memory': dict(translation_memory.stats, size=translation_memory.size(),
+                                       tokens_saved=translation_memory_metrics['tokens_saved']),
+            'prompt_compaction': dict(prompt_metrics),
             'rate_limit': f'{GEMINI_CALL_INTERVAL}s between calls',
+            'queue_depths': gemini_scheduler.queue_depths(),
+            'granted_calls': gemini_scheduler.granted,
+            'dropped_calls': gemini_scheduler.dropped,
+            'in_flight_calls': gemini_singleflight.in_flight(),
+            'coalesced_calls': gemini_singleflight.coalesced,
+            'live_sessions': gemini_scheduler.session_count(),
             'note': 'Free tier has limited quota - use "Enhance with AI" button sparingly'
         }
     }
@@ -485,6 +1302,13 @@ def transcribe_file():
                 'error': f'File type not allowed. Supported formats: {", ".join(ALLOWED_EXTENSIONS)}'
             }), 400
         
+        target_language = request.form.get('target_language', 'English')
+        translate_request = bool(target_language) and target_language.lower() not in ['english', 'en', 'auto', 'original']
+        enhance_request = request.form.get('enhance', 'false').lower() == 'true'
+        fields = requested_fields()
+        enhancements = requested_enhancements(fields) if enhance_request else []
+        gemini_calls = int(translate_request) + gemini_enhancement_calls(len(enhancements))
+        
         # Create a temporary file to store the upload
         with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{secure_filename(file.filename)}") as temp_file:
             file.save(temp_file.name)
@@ -513,14 +1337,29 @@ def transcribe_file():
                     'success': True,
                     'transcript': result['transcript'],
                     'confidence': result.get('confidence'),
-                    'filename': file.filename
+                    'filename': file.filename,
+                    'detected_language': detect_language(result['transcript'])[0]
                 }
                 
+                # Admission control once transcription is done, so the queue depth is current
+                retry_after = None
+                if gemini_calls:
+                    try:
+                        begin_gemini_request(request_priority('batch' if enhance_request else 'interactive'), gemini_calls)
+                    except GeminiBusyError as busy:
+                        # The transcript is already done, so return it without the Gemini steps
+                        retry_after = busy.retry_after
+                        if translate_request:
+                            response_data['translation_error'] = str(busy)
+                            translate_request = False
+                        if enhance_request and not LOCAL_FIRST:
+                            response_data['enhancement_error'] = str(busy)
+                            enhance_request = False
+                
                 # Check for translation request
-                target_language = request.form.get('target_language', 'English')
                 text_to_process = result['transcript']
                 
-                if target_language and target_language.lower() not in ['english', 'en', 'auto', 'original']:
+                if translate_request:
                     logger.info(f"Translation requested to: {target_language}")
                     translation_result = translate_text_with_gemini(result['transcript'], target_language)
                     
@@ -536,46 +1375,47 @@ def transcribe_file():
                         response_data['translation_error'] = translation_result['error']
                         logger.error(f"Translation failed: {translation_result['error']}")
                 
-                # Check if enhancement is requested (optional parameter)
-                enhance_request = request.form.get('enhance', 'false').lower() == 'true'
-                
                 if enhance_request:
                     logger.info("Enhancement requested, processing with Gemini...")
                     try:
                         # Use translated text for enhancement if available
                         source_text = text_to_process
+                        # Word timings only line up with the untranslated transcript
+                        words = result.get('words') if source_text == result['transcript'] else None
                         
                         # Only do one enhancement at a time to manage quota
-                        structured_result = enhance_text_with_gemini(source_text, "structure")
-                        
-                        if structured_result['success']:
-                            response_data['structured_text'] = structured_result['enhanced_text']
-                            if structured_result.get('fallback_used'):
-                                response_data['structure_fallback'] = True
-                        
-                        # Wait before next call
-                        time.sleep(1)
-                        
-                        expressions_result = enhance_text_with_gemini(source_text, "expressions")
-                        if expressions_result['success']:
-                            response_data['expressive_text'] = expressions_result['enhanced_text']
-                            if expressions_result.get('fallback_used'):
-                                response_data['expressions_fallback'] = True
+                        if 'structured_text' in enhancements:
+                            structured_result = enhance_text_with_gemini(source_text, "structure", words)
+                            if structured_result['success']:
+                                response_data['structured_text'] = structured_result['enhanced_text']
+                                if structured_result.get('fallback_used'):
+                                    response_data['structure_fallback'] = True
                         
-                        # Wait before summary
-                        time.sleep(1)
+                        if 'expressive_text' in enhancements:
+                            expressions_result = enhance_text_with_gemini(source_text, "expressions", words)
+                            if expressions_result['success']:
+                                response_data['expressive_text'] = expressions_result['enhanced_text']
+                                if expressions_result.get('fallback_used'):
+                                    response_data['expressions_fallback'] = True
                         
-                        summary_result = summarize_text_with_gemini(source_text)
-                        if summary_result['success']:
-                            response_data['summary'] = summary_result['summary']
-                            if summary_result.get('fallback_used'):
-                                response_data['summary_fallback'] = True
+                        if 'summary' in enhancements:
+                            summary_result = summarize_text_with_gemini(source_text)
+                            if summary_result['success']:
+                                response_data['summary'] = summary_result['summary']
+                                if summary_result.get('fallback_used'):
+                                    response_data['summary_fallback'] = True
                                 
+                    except GeminiBusyError:
+                        raise
                     except Exception as gemini_error:
                         logger.error(f"Gemini enhancement failed: {str(gemini_error)}")
                         response_data['enhancement_error'] = str(gemini_error)
                 
-                return jsonify(response_data)
+                response_data['result_id'] = save_result(response_data)
+                response = jsonify(select_fields(response_data, fields))
+                if retry_after is not None:
+                    response.headers['Retry-After'] = str(retry_after)
+                return response
             else:
                 logger.error(f"Transcription failed: {result['error']}")
                 return jsonify({
@@ -590,6 +1430,10 @@ def transcribe_file():
                 logger.info("Temporary file cleaned up after error")
             raise e
             
+    except GeminiBusyError as e:
+        return gemini_busy_response(e)
+    except InvalidRequestError as e:
+        return invalid_request_response(e)
     except Exception as e:
         logger.error(f"Unexpected error in transcribe_file: {str(e)}")
         return jsonify({
@@ -635,6 +1479,8 @@ def enhance_text():
                 'error': 'Empty text provided'
             }), 400
         
+        begin_gemini_request(request_priority('interactive', data), gemini_enhancement_calls(1), data)
+        
         logger.info(f"Enhancing text with type: {enhancement_type}")
         
         result = enhance_text_with_gemini(text, enhancement_type)
@@ -652,6 +1498,10 @@ def enhance_text():
                 'original_text': text
             }), 500
             
+    except GeminiBusyError as e:
+        return gemini_busy_response(e)
+    except InvalidRequestError as e:
+        return invalid_request_response(e)
     except Exception as e:
         logger.error(f"Error in enhance_text endpoint: {str(e)}")
         return jsonify({
@@ -679,6 +1529,8 @@ def summarize_text():
                 'error': 'Empty text provided'
             }), 400
         
+        begin_gemini_request(request_priority('interactive', data), gemini_enhancement_calls(1), data)
+        
         logger.info("Generating summary for text")
         
         result = summarize_text_with_gemini(text)
@@ -694,6 +1546,10 @@ def summarize_text():
                 'error': result['error']
             }), 500
             
+    except GeminiBusyError as e:
+        return gemini_busy_response(e)
+    except InvalidRequestError as e:
+        return invalid_request_response(e)
     except Exception as e:
         logger.error(f"Error in summarize_text endpoint: {str(e)}")
         return jsonify({
@@ -722,6 +1578,8 @@ def translate_text_endpoint():
                 'error': 'Empty text provided'
             }), 400
         
+        begin_gemini_request(request_priority('live', data), 1, data)
+        
         logger.info(f"Translating text to: {target_language}")
         
         result = translate_text_with_gemini(text, target_language)
@@ -733,7 +1591,10 @@ def translate_text_endpoint():
                 'translated_text': result['translated_text'],
                 'target_language': target_language,
                 'translation_skipped': result.get('skipped', False),
-                'fallback_used': result.get('fallback_used', False)
+                'fallback_used': result.get('fallback_used', False),
+                'translation_memory': result.get('translation_memory'),
+                'kept_segments': result.get('kept_segments', 0),
+                'detected_language': detect_language(text)[0]
             })
         else:
             return jsonify({
@@ -743,6 +1604,10 @@ def translate_text_endpoint():
                 'target_language': target_language
             }), 500
             
+    except GeminiBusyError as e:
+        return gemini_busy_response(e)
+    except InvalidRequestError as e:
+        return invalid_request_response(e)
     except Exception as e:
         logger.error(f"Error in translate_text endpoint: {str(e)}")
         return jsonify({
@@ -771,16 +1636,22 @@ def process_live_text():
                 'error': 'Empty text provided'
             }), 400
         
+        translate_request = bool(target_language) and target_language.lower() not in ['english', 'en', 'auto', 'original']
+        fields = requested_fields(data)
+        enhancements = requested_enhancements(fields)
+        begin_gemini_request(request_priority('live', data), gemini_enhancement_calls(len(enhancements)) + int(translate_request), data)
+        
         logger.info("Processing live text with translation and enhancements")
         
         text_to_process = text
         response_data = {
             'success': True,
-            'original_text': text
+            'original_text': text,
+            'detected_language': detect_language(text)[0]
         }
         
         # Translate first if requested
-        if target_language and target_language.lower() not in ['english', 'en', 'auto', 'original']:
+        if translate_request:
             translation_result = translate_text_with_gemini(text, target_language)
             if translation_result['success']:
                 text_to_process = translation_result['translated_text']
@@ -788,32 +1659,40 @@ def process_live_text():
                 response_data['target_language'] = target_language
                 if translation_result.get('fallback_used'):
                     response_data['translation_fallback'] = True
+                if translation_result.get('skipped'):
+                    response_data['translation_skipped'] = True
             else:
                 response_data['translation_error'] = translation_result['error']
         
-        # Get all enhancements using translated text
-        structured_result = enhance_text_with_gemini(text_to_process, "structure")
-        expressions_result = enhance_text_with_gemini(text_to_process, "expressions")
-        summary_result = summarize_text_with_gemini(text_to_process)
-        
-        # Add enhancements if successful
-        if structured_result['success']:
-            response_data['structured_text'] = structured_result['enhanced_text']
-        else:
-            response_data['structure_error'] = structured_result['error']
+        # Get the requested enhancements using translated text
+        if 'structured_text' in enhancements:
+            structured_result = enhance_text_with_gemini(text_to_process, "structure")
+            if structured_result['success']:
+                response_data['structured_text'] = structured_result['enhanced_text']
+            else:
+                response_data['structure_error'] = structured_result['error']
         
-        if expressions_result['success']:
-            response_data['expressive_text'] = expressions_result['enhanced_text']
-        else:
-            response_data['expressions_error'] = expressions_result['error']
+        if 'expressive_text' in enhancements:
+            expressions_result = enhance_text_with_gemini(text_to_process, "expressions")
+            if expressions_result['success']:
+                response_data['expressive_text'] = expressions_result['enhanced_text']
+            else:
+                response_data['expressions_error'] = expressions_result['error']
         
-        if summary_result['success']:
-            response_data['summary'] = summary_result['summary']
-        else:
-            response_data['summary_error'] = summary_result['error']
+        if 'summary' in enhancements:
+            summary_result = summarize_text_with_gemini(text_to_process)
+            if summary_result['success']:
+                response_data['summary'] = summary_result['summary']
+            else:
+                response_data['summary_error'] = summary_result['error']
         
-        return jsonify(response_data)
+        response_data['result_id'] = save_result(response_data)
+        return jsonify(select_fields(response_data, fields))
         
+    except GeminiBusyError as e:
+        return gemini_busy_response(e)
+    except InvalidRequestError as e:
+        return invalid_request_response(e)
     except Exception as e:
         logger.error(f"Error in process_live_text endpoint: {str(e)}")
         return jsonify({
@@ -839,7 +1718,7 @@ def test_gemini():
     
     for model_name in test_models:
         try:
-            model = genai.GenerativeModel(model_name)
+            model = get_genai().GenerativeModel(model_name)
             # Try a simple generation
             response = model.generate_content("Say hello")
             results[model_name] = {
@@ -866,5 +1745,9 @@ def internal_error(error):
         'error': 'Internal server error'
     }), 500
 
+startup_metrics['import_seconds'] = round(time.monotonic() - START_TIME, 3)
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    start_warmup()
+    app.run(debug=os.getenv('FLASK_DEBUG') == '1', host='0.0.0.0', port=int(os.getenv('PORT', '5000')))
\ No newline at end of file
@@ -0,0 +1,26 @@
+import os
+
+# Production launcher: gunicorn -c gunicorn.conf.py app:app
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# One process keeps the Gemini scheduler, request coalescing and translation memory shared;
+# requests mostly wait on upstream APIs, so concurrency comes from threads
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+
+# Import the app once in the master so workers fork already loaded
+preload_app = True
+
+# Transcription polls AssemblyAI until the file is done
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '300'))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info')
+
+def post_worker_init(worker):
+    """Warm up each worker after fork; /ready reports 503 until it finishes"""
+    from app import start_warmup
+    start_warmup()
@@ -0,0 +1,147 @@
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter
+
+# Character n-gram profiles are built from this bundled sample text on first use
+SAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'language_samples.json')
+NGRAM_SIZES = (1, 2, 3)
+MIN_CONFIDENCE = 0.5  # Below this the detected language is reported as unknown
+SKIP_CONFIDENCE = 0.95  # Text is only treated as already translated above this
+MIN_LETTERS = 12  # Shorter text is too ambiguous to classify on n-grams alone
+
+# Languages written in their own script are identified from the script alone
+SCRIPT_RANGES = [
+    ('Korean', [(0xAC00, 0xD7AF), (0x1100, 0x11FF), (0x3130, 0x318F)]),
+    ('Japanese', [(0x3040, 0x30FF)]),
+    ('Chinese', [(0x4E00, 0x9FFF), (0x3400, 0x4DBF)]),
+    ('Arabic', [(0x0600, 0x06FF), (0x0750, 0x077F)]),
+    ('Hindi', [(0x0900, 0x097F)]),
+    ('Russian', [(0x0400, 0x04FF)]),
+]
+# Other languages share these scripts, so the script alone names the language only when its
+# own letters appear and the other languages' distinguishing letters don't
+SCRIPT_LETTERS = {
+    # ы э ё are Russian (Bulgarian has none); the rest mark Ukrainian, Belarusian, Serbian,
+    # Macedonian, Kazakh, Kyrgyz and Tajik
+    'Russian': ('ыэё', 'іїєґўјљњћџѓќѕәғқңөұүһӣӯҳҷ'),
+    # Persian and Urdu letters
+    'Arabic': ('', 'پچژگکیٹڈڑںےھۀ'),
+}
+# Scripts that can't be told apart from other languages by letters (Devanagari is also
+# Marathi and Nepali, Han is also Japanese kanji); these never reach SKIP_CONFIDENCE
+SHARED_SCRIPT_CONFIDENCE = 0.7
+SHARED_SCRIPTS = {'Hindi', 'Chinese'}
+
+# Names and codes clients may send as target_language
+LANGUAGE_ALIASES = {
+    'en': 'English', 'es': 'Spanish', 'fr': 'French', 'de': 'German', 'it': 'Italian',
+    'pt': 'Portuguese', 'nl': 'Dutch', 'pl': 'Polish', 'sv': 'Swedish', 'no': 'Norwegian',
+    'nb': 'Norwegian', 'da': 'Danish', 'fi': 'Finnish', 'ru': 'Russian', 'zh': 'Chinese',
+    'ja': 'Japanese', 'ko': 'Korean', 'ar': 'Arabic', 'hi': 'Hindi'
+}
+
+LETTER_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+_profiles = None
+_profiles_lock = threading.Lock()
+
+def normalize_language(name):
+    """Canonical language name for a client-supplied name or code, e.g. "es" -> "Spanish" """
+    if not name:
+        return None
+    key = name.strip().lower()
+    if key in LANGUAGE_ALIASES:
+        return LANGUAGE_ALIASES[key]
+    # Accept names like "Spanish (Español)" as shown in the language picker
+    return key.split('(')[0].strip().title()
+
+def _ngrams(text):
+    counts = Counter()
+    for word in LETTER_RE.findall(text.lower()):
+        padded = f" {word} "
+        for size in NGRAM_SIZES:
+            for i in range(len(padded) - size + 1):
+                gram = padded[i:i + size]
+                if gram.strip():
+                    counts[gram] += 1
+    return counts
+
+def _load_profiles():
+    """Build per-language log-probability tables from the bundled samples"""
+    global _profiles
+    if _profiles is None:
+        with _profiles_lock:
+            if _profiles is None:
+                with open(SAMPLES_PATH, encoding='utf-8') as f:
+                    samples = json.load(f)
+                profiles = {}
+                for language, sample in samples.items():
+                    counts = _ngrams(sample)
+                    total = sum(counts.values())
+                    vocabulary = len(counts) + 1
+                    profiles[language] = (
+                        {gram: math.log((count + 1) / (total + vocabulary)) for gram, count in counts.items()},
+                        math.log(1 / (total + vocabulary))
+                    )
+                _profiles = profiles
+    return _profiles
+
+def _script_language(text):
+    letters = [char for char in text if char.isalpha()]
+    if not letters:
+        return None, 0.0
+    counts = Counter()
+    for char in letters:
+        code = ord(char)
+        for language, ranges in SCRIPT_RANGES:
+            if any(start <= code <= end for start, end in ranges):
+                counts[language] += 1
+                break
+    if not counts:
+        return None, 0.0
+    # Japanese mixes kana with kanji, so any kana at all means Japanese rather than Chinese
+    if counts['Japanese'] and counts['Chinese']:
+        counts['Japanese'] += counts.pop('Chinese')
+    language, count = counts.most_common(1)[0]
+    share = count / len(letters)
+    if language in SCRIPT_LETTERS:
+        own, others = SCRIPT_LETTERS[language]
+        lowered = text.lower()
+        if any(char in others for char in lowered) or (own and not any(char in own for char in lowered)):
+            return None, share
+    if language in SHARED_SCRIPTS:
+        share *= SHARED_SCRIPT_CONFIDENCE
+    return language, share
+
+def detect_language(text):
+    """Return (language, confidence) for text, with language None when it can't be told reliably"""
+    language, share = _script_language(text)
+    if share >= 0.5:
+        # Mostly non-Latin script: either identified from it or not at all
+        return (language, round(share, 2)) if language and share >= MIN_CONFIDENCE else (None, 0.0)
+
+    grams = _ngrams(text)
+    if sum(len(word) for word in LETTER_RE.findall(text)) < MIN_LETTERS:
+        return None, 0.0
+
+    scores = {}
+    for candidate, (table, unseen) in _load_profiles().items():
+        scores[candidate] = sum(table.get(gram, unseen) * count for gram, count in grams.items())
+
+    # Softmax over per-n-gram average log-likelihoods gives a rough confidence
+    total_grams = sum(grams.values())
+    averages = {candidate: score / total_grams for candidate, score in scores.items()}
+    best = max(averages, key=averages.get)
+    weights = {candidate: math.exp((value - averages[best]) * 40) for candidate, value in averages.items()}
+    confidence = 1 / sum(weights.values())
+    if confidence < MIN_CONFIDENCE:
+        return None, round(confidence, 2)
+    return best, round(confidence, 2)
+
+def is_in_language(text, language):
+    """Whether text is reliably in language, strictly enough to skip translating it"""
+    detected, confidence = detect_language(text)
+    return detected is not None and detected == language and confidence >= SKIP_CONFIDENCE
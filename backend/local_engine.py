@@ -0,0 +1,303 @@
+import os
+import re
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Local processing configuration
+LOCAL_ENGINE_WORKERS = int(os.getenv('LOCAL_ENGINE_WORKERS', '2'))  # 0 runs everything in the request thread
+LOCAL_ENGINE_TIMEOUT = float(os.getenv('LOCAL_ENGINE_TIMEOUT', '5'))
+
+# Pause thresholds (milliseconds) between consecutive words
+SENTENCE_PAUSE_MS = 700
+COMMA_PAUSE_MS = 300
+
+# Without timing information, force a sentence break after this many words
+MAX_SENTENCE_WORDS = 22
+MIN_SENTENCE_WORDS = 5
+
+SENTENCE_STARTERS = {
+    'so', 'and then', 'but', 'now', 'okay', 'ok', 'anyway', 'then',
+    'however', 'actually', 'basically', 'first', 'second', 'next', 'finally', 'today',
+    'yesterday', 'tomorrow', 'i', "i'm", "i've", "i'll", 'we', "we're", "let's", "it's",
+    "there's", 'please', 'thanks', 'thank you'
+}
+# Starter words that don't open a sentence when followed by these words
+NOT_STARTER_PAIRS = {
+    'so far', 'so much', 'so that', 'so many', 'now that', 'then we', 'next week', 'next month',
+    'next year', 'next time'
+}
+# Words that rarely end a sentence, so no break is placed after them
+NON_TERMINAL = {
+    'a', 'an', 'the', 'and', 'or', 'but', 'so', 'of', 'to', 'in', 'on', 'at', 'by', 'for', 'with',
+    'from', 'into', 'about', 'as', 'than', 'that', 'which', 'who', 'what', 'when', 'where', 'why',
+    'how', 'is', 'are', 'was', 'were', 'be', 'am', 'do', 'does', 'did', 'have', 'has', 'had',
+    'can', 'could', 'will', 'would', 'should', 'my', 'our', 'your', 'their', 'his', 'her', 'its',
+    'very', 'really', 'because', 'if', 'i', 'we', 'you', 'they', 'not',
+    # Verbs that introduce a clause ("I think we should ...")
+    'think', 'know', 'guess', 'mean', 'believe', 'hope', 'feel', 'suppose', 'say', 'said', 'says',
+    'tell', 'told', 'want', 'wants', 'need', 'needs', 'wish'
+}
+# Time phrases that usually close a clause ("start hiring before then the team needs ...")
+CLAUSE_ENDINGS = {
+    'before then', 'until then', 'by then', 'since then', 'next week', 'next month', 'next year',
+    'last week', 'last month', 'last year', 'right now', 'for now'
+}
+# Words that carry the clause on past a clause ending ("next year and I think ...")
+CONTINUATIONS = {
+    'and', 'or', 'but', 'so', 'because', 'if', 'when', 'while', 'to', 'for', 'with', 'of', 'in',
+    'on', 'at', 'as', 'than', 'that', 'which', 'who', 'is', 'are', 'was', 'were', 'will', 'would'
+}
+QUESTION_STARTERS = {
+    'what', 'why', 'how', 'where', 'when', 'who', 'whom', 'whose', 'which',
+    'is', 'are', 'was', 'were', 'do', 'does', 'did', 'can', 'could', 'would',
+    'will', 'should', 'shall', 'have', 'has', 'am', "isn't", "aren't", "don't",
+    "doesn't", "didn't", "can't", "won't"
+}
+COMMA_BEFORE = {'but', 'because', 'although', 'though', 'which', 'so', 'however', 'unless'}
+COMMA_AFTER = {'yes', 'no', 'well', 'okay', 'ok', 'actually', 'however', 'anyway', 'basically'}
+ALWAYS_CAPITALIZED = {
+    'i': 'I', "i'm": "I'm", "i've": "I've", "i'll": "I'll", "i'd": "I'd",
+    'monday': 'Monday', 'tuesday': 'Tuesday', 'wednesday': 'Wednesday', 'thursday': 'Thursday',
+    'friday': 'Friday', 'saturday': 'Saturday', 'sunday': 'Sunday',
+    'january': 'January', 'february': 'February', 'april': 'April', 'june': 'June', 'july': 'July',
+    'august': 'August', 'september': 'September', 'october': 'October', 'november': 'November',
+    'december': 'December', 'english': 'English'
+}
+
+STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'but', 'if', 'then', 'so', 'of', 'to', 'in', 'on', 'at', 'by',
+    'for', 'with', 'about', 'as', 'into', 'from', 'up', 'down', 'out', 'over', 'is', 'are', 'was',
+    'were', 'be', 'been', 'being', 'am', 'do', 'does', 'did', 'have', 'has', 'had', 'i', 'me', 'my',
+    'we', 'our', 'you', 'your', 'he', 'she', 'it', 'its', 'they', 'them', 'their', 'this', 'that',
+    'these', 'those', 'there', 'here', 'what', 'which', 'who', 'when', 'where', 'why', 'how', 'not',
+    'no', 'yes', 'just', 'like', 'um', 'uh', 'okay', 'ok', 'really', 'very', 'can', 'could', 'will',
+    'would', 'should', 'also', 'too', 'all', 'some', 'any', 'more', 'most', 'other', 'than', 'now',
+    'well', 'get', 'got', 'going', 'know', 'think', "it's", "i'm", "don't", "that's"
+}
+
+POSITIVE_WORDS = {'good', 'great', 'excellent', 'amazing', 'awesome', 'happy', 'glad', 'love', 'wonderful', 'thanks', 'perfect', 'excited'}
+NEGATIVE_WORDS = {'bad', 'terrible', 'awful', 'problem', 'issue', 'sad', 'angry', 'worried', 'wrong', 'fail', 'failed', 'sorry', 'hate'}
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+TERMINAL_PUNCTUATION = ('.', '!', '?')
+
+def _normalize(token):
+    return ''.join(WORD_RE.findall(token.lower()))
+
+def _word_gaps(tokens, words):
+    """Align AssemblyAI word timings to tokens and return the pause after each token in ms"""
+    gaps = [None] * len(tokens)
+    if not words:
+        return gaps
+
+    timings = [(_normalize(w.get('text', '')), w.get('start'), w.get('end')) for w in words]
+    position = 0
+    aligned = []
+    for index, token in enumerate(tokens):
+        norm = _normalize(token)
+        # Look a few words ahead so a dropped or merged word doesn't derail the alignment
+        for offset in range(position, min(position + 3, len(timings))):
+            if timings[offset][0] == norm:
+                aligned.append((index, timings[offset]))
+                position = offset + 1
+                break
+
+    for (index, current), (next_index, following) in zip(aligned, aligned[1:]):
+        if next_index == index + 1 and current[2] is not None and following[1] is not None:
+            gaps[index] = following[1] - current[2]
+    return gaps
+
+def _finish_sentence(sentence):
+    first = _normalize(sentence[0]) if sentence else ''
+    terminal = '?' if first in QUESTION_STARTERS else '.'
+    last = sentence[-1].rstrip(',;:')
+    if not last.endswith(TERMINAL_PUNCTUATION):
+        last += terminal
+    sentence[-1] = last
+    sentence[0] = sentence[0][:1].upper() + sentence[0][1:]
+    return ' '.join(sentence)
+
+def restore_punctuation(text, words=None):
+    """Restore sentence breaks, commas and capitalization using pauses and lexical cues"""
+    tokens = text.split()
+    if not tokens:
+        return text.strip()
+
+    gaps = _word_gaps(tokens, words)
+    sentences = []
+    sentence = []
+
+    for index, token in enumerate(tokens):
+        norm = _normalize(token)
+        if norm in ALWAYS_CAPITALIZED and token.lower().strip(",.!?;:") == norm:
+            token = token.lower().replace(norm, ALWAYS_CAPITALIZED[norm], 1)
+        sentence.append(token)
+
+        if index == len(tokens) - 1:
+            break
+        if token.endswith(TERMINAL_PUNCTUATION):
+            sentences.append(_finish_sentence(sentence))
+            sentence = []
+            continue
+
+        following = _normalize(tokens[index + 1])
+        following_pair = f"{following} {_normalize(tokens[index + 2])}" if index + 2 < len(tokens) else following
+        gap = gaps[index]
+        length = len(sentence)
+
+        if gap is not None:
+            is_break = gap >= SENTENCE_PAUSE_MS and length >= 2
+            is_comma = not is_break and gap >= COMMA_PAUSE_MS and length >= 3
+        else:
+            starter = (following in SENTENCE_STARTERS or following_pair in SENTENCE_STARTERS) \
+                and following_pair not in NOT_STARTER_PAIRS
+            # Don't split a time phrase, and with two starters in a row ("start now please send")
+            # break before the second one
+            if f"{norm} {following}" in CLAUSE_ENDINGS or (
+                following not in NON_TERMINAL and index + 2 < len(tokens)
+                and _normalize(tokens[index + 2]) in SENTENCE_STARTERS
+            ):
+                starter = False
+            clause_end = index > 0 and f"{_normalize(tokens[index - 1])} {norm}" in CLAUSE_ENDINGS \
+                and following not in CONTINUATIONS
+            is_break = norm not in NON_TERMINAL and (
+                ((starter or clause_end) and length >= MIN_SENTENCE_WORDS) or length >= MAX_SENTENCE_WORDS
+            )
+            is_comma = False
+
+        if is_break:
+            sentences.append(_finish_sentence(sentence))
+            sentence = []
+        elif not token.endswith((',', ';', ':')):
+            conjunction = following in COMMA_BEFORE and following_pair not in NOT_STARTER_PAIRS
+            if is_comma or (conjunction and length >= 4) or (length == 1 and norm in COMMA_AFTER):
+                sentence[-1] = token + ','
+
+    if sentence:
+        sentences.append(_finish_sentence(sentence))
+    return ' '.join(sentences)
+
+def split_sentences(text):
+    """Split text into sentences, restoring punctuation first when the text has none"""
+    text = text.strip()
+    if not text:
+        return []
+    if sum(text.count(mark) for mark in TERMINAL_PUNCTUATION) < 2 and len(text.split()) > MAX_SENTENCE_WORDS:
+        text = restore_punctuation(text)
+    return [s for s in SENTENCE_SPLIT_RE.split(text) if s.strip()]
+
+def _tfidf_matrix(sentences):
+    import numpy as np
+    tokenized = [[w for w in WORD_RE.findall(s.lower()) if w not in STOPWORDS and len(w) > 1] for s in sentences]
+    vocabulary = {word: i for i, word in enumerate(sorted({w for tokens in tokenized for w in tokens}))}
+    if not vocabulary:
+        return None
+
+    counts = np.zeros((len(sentences), len(vocabulary)))
+    for row, tokens in enumerate(tokenized):
+        for word in tokens:
+            counts[row, vocabulary[word]] += 1
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    lengths = np.maximum(counts.sum(axis=1, keepdims=True), 1)
+    matrix = (counts / lengths) * idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def _textrank(similarity, damping=0.85, iterations=50, tolerance=1e-6):
+    import numpy as np
+    np.fill_diagonal(similarity, 0)
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, row_sums, out=np.full_like(similarity, 1.0 / len(similarity)), where=row_sums > 0)
+    scores = np.full(len(similarity), 1.0 / len(similarity))
+    for _ in range(iterations):
+        updated = (1 - damping) / len(similarity) + damping * transition.T @ scores
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+def extractive_summary(text, max_sentences=3):
+    """Select the most central sentences with TF-IDF weighted TextRank, kept in original order"""
+    sentences = split_sentences(text)
+    if len(sentences) <= max_sentences:
+        return ' '.join(sentences)
+
+    # NumPy is imported on first use to keep server start-up light
+    import numpy as np
+    matrix = _tfidf_matrix(sentences)
+    if matrix is None:
+        return ' '.join(sentences[:max_sentences])
+
+    scores = _textrank(matrix @ matrix.T)
+    # Slight preference for earlier sentences, which usually introduce the topic
+    scores = scores * (1 + 0.1 / np.sqrt(np.arange(1, len(sentences) + 1)))
+    count = min(max_sentences, max(1, round(len(sentences) * 0.2)) + 1)
+    selected = sorted(np.argsort(-scores, kind='stable')[:count])
+    return ' '.join(sentences[i] for i in selected)
+
+def detect_tone(text):
+    """Score tone from a small sentiment lexicon"""
+    tokens = WORD_RE.findall(text.lower())
+    positive = sum(token in POSITIVE_WORDS for token in tokens)
+    negative = sum(token in NEGATIVE_WORDS for token in tokens)
+    if positive > negative:
+        return 'positive'
+    if negative > positive:
+        return 'concerned'
+    return None
+
+def express_text(text, words=None):
+    """Punctuate text and mark sentence-level tone and emphasis"""
+    sentences = split_sentences(restore_punctuation(text, words))
+    expressed = []
+    for sentence in sentences:
+        tone = detect_tone(sentence)
+        if tone == 'positive' and sentence.endswith('.'):
+            sentence = sentence[:-1] + '!'
+        expressed.append(sentence)
+    result = ' '.join(expressed)
+    overall = detect_tone(text)
+    return f"{result} ({overall} tone)" if overall else result
+
+def enhance_locally(text, enhancement_type, words=None):
+    """Local equivalent of the Gemini enhancement types"""
+    if enhancement_type == "expressions":
+        return express_text(text, words)
+    return restore_punctuation(text, words)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a server process that already runs request threads can deadlock the
+            # children, so workers start from a clean forkserver (spawn where unavailable)
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _pool = ProcessPoolExecutor(max_workers=LOCAL_ENGINE_WORKERS, mp_context=context)
+        return _pool
+
+def run_local(fn, *args):
+    """Run a local engine function in the process pool, falling back to the current thread"""
+    global _pool
+    if LOCAL_ENGINE_WORKERS <= 0:
+        return fn(*args)
+    try:
+        return _get_pool().submit(fn, *args).result(timeout=LOCAL_ENGINE_TIMEOUT)
+    except BrokenProcessPool:
+        logger.warning("Local engine process pool broken, restarting it")
+        with _pool_lock:
+            _pool = None
+    except Exception as e:
+        logger.warning(f"Local engine worker failed, running inline: {str(e)}")
+    return fn(*args)
@@ -0,0 +1,99 @@
+import re
+from language_id import detect_language
+
+# Prompt templates per task, fullest first. Short inputs get the shortest template,
+# since the instruction would otherwise be a large share of the request.
+PROMPT_TEMPLATES = {
+    'structure': [
+        "Fix punctuation, capitalization, and grammar in this text. Keep it concise:\n\n{text}",
+        "Punctuate and fix grammar:\n\n{text}"
+    ],
+    'expressions': [
+        "Add appropriate emotions and tone to this text. Keep it natural:\n\n{text}",
+        "Add natural tone and emotion:\n\n{text}"
+    ],
+    'readability': [
+        "Improve punctuation and readability:\n\n{text}"
+    ],
+    'summary': [
+        "Summarize this text in 2-3 sentences, highlighting key points:\n\n{text}",
+        "Summarize in 2-3 sentences:\n\n{text}"
+    ],
+    'translate': [
+        "Translate the following text to {language}. Maintain the original meaning and tone. Only return the translation, no additional commentary:\n\n{text}",
+        "Translate to {language}, reply with the translation only:\n\n{text}"
+    ],
+    'translate_numbered': [
+        "Translate each numbered line to {language}. Maintain the original meaning and tone. Return only the translated lines with the same numbering, no additional commentary:\n\n{text}",
+        "Translate each numbered line to {language}, reply with the same numbered lines only:\n\n{text}"
+    ]
+}
+
+# Appended to translation prompts when the translation memory holds similar earlier sentences
+REFERENCE_TEMPLATE = (
+    "\n\nEarlier translations of similar sentences, for consistent wording only. They may differ "
+    "in names, numbers or meaning, so translate the text above exactly:\n{references}"
+)
+
+# Use the full template only when its instruction is at most this share of the text
+MAX_INSTRUCTION_RATIO = 0.25
+
+FILLER_RE = re.compile(r"(?:(?<=\s)|^)(?:u+m+|u+h+m*|e+r+m*|a+h+|h+m+|m{2,})(?:[,.]+)?(?=\s|$)", re.IGNORECASE)
+FILLER_PHRASE_RE = re.compile(r"\b(?:you know|i mean),\s*", re.IGNORECASE)
+# A word or phrase of up to four words repeated back to back, e.g. "I think I think" or "the the"
+REPEAT_RE = re.compile(r"\b((?:[\w']+[\s,]+){0,3}[\w']+)(?:[\s,]+\1\b)+", re.IGNORECASE)
+# Single words are only collapsed when they are typical stutters; doubled content words
+# are usually deliberate ("very very", "bye bye", "no no") and "that that" or "had had" are grammatical
+STUTTER_WORDS = {
+    'i', "i'm", 'we', 'you', 'he', 'she', 'it', "it's", 'they', 'the', 'a', 'an', 'and', 'but', 'or',
+    'to', 'of', 'in', 'on', 'at', 'for', 'with', 'my', 'our', 'your', 'this', 'if', 'because'
+}
+SPACE_BEFORE_PUNCTUATION_RE = re.compile(r"\s+([,.!?;:])")
+
+def estimate_tokens(text):
+    """Rough token count: about four characters per token for Latin text, one per two characters otherwise"""
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return max(1, round(ascii_chars / 4 + (len(text) - ascii_chars) / 2)) if text else 0
+
+def _collapse_repeat(match):
+    phrase = match.group(1)
+    if phrase.isdigit() or (' ' not in phrase and phrase.lower() not in STUTTER_WORDS):
+        return match.group(0)
+    return phrase
+
+def compact_transcript(text):
+    """Remove fillers, stutters and consecutive duplicate phrases, and normalize whitespace.
+
+    The rules are English ("um" is a word in German and Portuguese), so any other text,
+    including text too short to identify, is returned unchanged.
+    """
+    if detect_language(text)[0] != 'English':
+        return text
+    compacted = FILLER_PHRASE_RE.sub('', text)
+    compacted = FILLER_RE.sub('', compacted)
+    compacted = REPEAT_RE.sub(_collapse_repeat, compacted)
+    compacted = ' '.join(compacted.split())
+    compacted = SPACE_BEFORE_PUNCTUATION_RE.sub(r'\1', compacted)
+    # Never hand the model an empty prompt because the speaker only said "um"
+    return compacted or text.strip()
+
+def build_prompt(task, text, **fields):
+    """Fill the smallest template that suits the text length"""
+    templates = PROMPT_TEMPLATES[task]
+    text_tokens = estimate_tokens(text)
+    for template in templates:
+        instruction_tokens = estimate_tokens(template.format(text='', **fields))
+        if instruction_tokens <= text_tokens * MAX_INSTRUCTION_RATIO:
+            return template.format(text=text, **fields)
+    return templates[-1].format(text=text, **fields)
+
+def baseline_prompt(task, text, **fields):
+    """The prompt that would be sent without compaction, for measuring savings"""
+    return PROMPT_TEMPLATES[task][0].format(text=text, **fields)
+
+def add_references(prompt, references):
+    """Append (source, translation) pairs of similar earlier sentences to a translation prompt"""
+    if not references:
+        return prompt
+    lines = "\n".join(f"- {source.strip()} => {translation.strip()}" for source, translation in references)
+    return prompt + REFERENCE_TEMPLATE.format(references=lines)
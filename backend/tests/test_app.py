@@ -0,0 +1,133 @@
+import gzip
+import json
+import pytest
+import app as server
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, 'GEMINI_API_KEY', 'test-key')
+    monkeypatch.setattr(server, 'LOCAL_FIRST', False)
+    monkeypatch.setattr(server, 'rate_limit_gemini', lambda: None)
+    monkeypatch.setattr(server, 'translation_memory', server.TranslationMemory())
+    return server.app.test_client()
+
+def test_translation_input_is_not_compacted(client, monkeypatch):
+    prompts = []
+    monkeypatch.setattr(server, 'call_gemini', lambda prompt: prompts.append(prompt) or "Translated.")
+    text = "Wir treffen uns morgen um neun Uhr im Büro, und er bringt den Bericht mit."
+    response = client.post('/translate-text', json={'text': text, 'target_language': 'Spanish'})
+    assert response.status_code == 200
+    assert response.get_json()['original_text'] == text
+    assert prompts and prompts[0].endswith(text)
+
+def test_ukrainian_is_translated_to_russian(client, monkeypatch):
+    monkeypatch.setattr(server, 'call_gemini', lambda prompt: "Мы встретимся завтра.")
+    text = "Ми зустрінемося завтра о дев'ятій годині в офісі, і він принесе звіт."
+    data = client.post('/translate-text', json={'text': text, 'target_language': 'Russian'}).get_json()
+    assert data['translation_skipped'] is False
+    assert data['translated_text'] == "Мы встретимся завтра."
+
+def test_text_in_target_language_is_returned_unchanged(client, monkeypatch):
+    monkeypatch.setattr(server, 'call_gemini', lambda prompt: pytest.fail("Gemini should not be called"))
+    text = "Wir treffen uns morgen um neun Uhr im Büro, und er bringt den Bericht mit.  Ähm, das ist alles."
+    data = client.post('/translate-text', json={'text': text, 'target_language': 'German'}).get_json()
+    assert data['translation_skipped'] is True
+    assert data['translated_text'] == text
+
+def test_sentences_in_target_language_are_reported_separately(client, monkeypatch):
+    monkeypatch.setattr(server, 'call_gemini', lambda prompt: "Nos vemos mañana en la oficina.")
+    text = ("We will meet tomorrow at nine in the office. "
+            "Esta semana hemos trabajado mucho y estamos muy contentos con los resultados del proyecto.")
+    data = client.post('/translate-text', json={'text': text, 'target_language': 'Spanish'}).get_json()
+    assert data['kept_segments'] == 1
+    assert data['translation_memory'] == {'reused_segments': 0, 'translated_segments': 1, 'reference_translations': 0}
+
+@pytest.mark.parametrize('fields', [5, {'summary': True}, ['summary', 3], False])
+def test_invalid_fields_are_rejected(client, fields):
+    response = client.post('/process-live-text', json={'text': 'hello there', 'fields': fields})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+def test_similar_sentence_is_sent_to_the_model_as_a_reference(client, monkeypatch):
+    prompts = []
+    answers = iter(["Envía el informe a Alice.", "Envía el informe a Maria."])
+    monkeypatch.setattr(server, 'call_gemini', lambda prompt: prompts.append(prompt) or next(answers))
+    first = "Please send the quarterly sales report to Alice in the finance department today."
+    second = first.replace("Alice", "Maria")
+    client.post('/translate-text', json={'text': first, 'target_language': 'Spanish'})
+    data = client.post('/translate-text', json={'text': second, 'target_language': 'Spanish'}).get_json()
+
+    assert data['translated_text'] == "Envía el informe a Maria."
+    assert data['translation_memory']['reference_translations'] == 1
+    assert prompts[1].startswith("Translate") and "Earlier translations of similar sentences" in prompts[1]
+    assert f"- {first} => Envía el informe a Alice." in prompts[1]
+
+def test_misaligned_numbered_reply_is_retried_without_queueing_again(client, monkeypatch):
+    slots = []
+    monkeypatch.setattr(server, 'rate_limit_gemini', lambda: slots.append(1))
+    answers = iter(["Una sola línea sin números.", "Nos vemos mañana. El informe está listo."])
+    monkeypatch.setattr(server, 'call_gemini', lambda prompt: next(answers))
+    data = client.post('/translate-text', json={
+        'text': "We will meet tomorrow at nine. The report is ready for review.",
+        'target_language': 'Spanish'
+    }).get_json()
+    assert data['translated_text'] == "Nos vemos mañana. El informe está listo."
+    assert len(slots) == 1
+
+def test_translation_memory_savings_are_not_reported_as_compaction(client, monkeypatch):
+    monkeypatch.setattr(server, 'call_gemini', lambda prompt: "Nos vemos mañana en la oficina.")
+    text = "We will meet tomorrow at nine in the office."
+    client.post('/translate-text', json={'text': text, 'target_language': 'Spanish'})
+    response = client.post('/translate-text', json={'text': text, 'target_language': 'Spanish'})
+    assert response.get_json()['translation_memory']['reused_segments'] == 1
+    assert int(response.headers['X-Translation-Memory-Tokens-Saved']) == server.estimate_tokens(text)
+    assert 'X-Prompt-Tokens-Saved' not in response.headers
+
+def test_full_text_retry_records_no_compaction_savings(client, monkeypatch):
+    monkeypatch.setattr(server, 'prompt_metrics', {'prompts': 0, 'tokens_sent': 0, 'tokens_saved': 0})
+    answers = iter(["Una sola línea sin números.", "Nos vemos mañana. El informe está listo."])
+    monkeypatch.setattr(server, 'call_gemini', lambda prompt: next(answers))
+    response = client.post('/translate-text', json={
+        'text': "We will meet tomorrow at nine. The report is ready for review.",
+        'target_language': 'Spanish'
+    })
+    assert response.headers['X-Prompt-Tokens-Saved'] == '0'
+    assert 'X-Translation-Memory-Tokens-Saved' not in response.headers
+    assert server.prompt_metrics['prompts'] == 2
+    assert server.prompt_metrics['tokens_saved'] == 0
+
+def test_matching_if_none_match_returns_304(client, monkeypatch):
+    monkeypatch.setattr(server, 'result_store', server.OrderedDict())
+    result_id = server.save_result({'success': True, 'transcript': 'hello there'})
+    first = client.get(f'/results/{result_id}')
+    assert first.status_code == 200 and first.headers['ETag']
+    second = client.get(f'/results/{result_id}', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.data == b''
+
+def test_large_result_is_gzipped(client, monkeypatch):
+    monkeypatch.setattr(server, 'brotli', None)
+    monkeypatch.setattr(server, 'result_store', server.OrderedDict())
+    result_id = server.save_result({'success': True, 'transcript': 'hello there ' * 200})
+    response = client.get(f'/results/{result_id}', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data))['transcript'] == 'hello there ' * 200
+
+def test_small_result_is_not_compressed(client, monkeypatch):
+    monkeypatch.setattr(server, 'result_store', server.OrderedDict())
+    result_id = server.save_result({'success': True, 'transcript': 'hello there'})
+    response = client.get(f'/results/{result_id}', headers={'Accept-Encoding': 'gzip, br'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()['transcript'] == 'hello there'
+
+def test_fields_skip_gemini_calls_that_were_not_asked_for(client, monkeypatch):
+    prompts = []
+    monkeypatch.setattr(server, 'call_gemini', lambda prompt: prompts.append(prompt) or "A short summary.")
+    response = client.post('/process-live-text', json={
+        'text': 'we met today and agreed to ship the new release next week', 'fields': 'summary'
+    })
+    data = response.get_json()
+    assert data['summary'] == "A short summary."
+    assert 'structured_text' not in data and 'expressive_text' not in data
+    assert len(prompts) == 1
@@ -0,0 +1,117 @@
+import time
+import pytest
+import app as server
+from app import CircuitBreaker
+
+class GeminiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"{code} error")
+        self.code = code
+
+class Response:
+    def __init__(self, text):
+        self._text = text
+
+    @property
+    def text(self):
+        if isinstance(self._text, Exception):
+            raise self._text
+        return self._text
+
+@pytest.fixture
+def models(monkeypatch):
+    """Fake models keyed by name: each entry is (delay seconds, text or exception)"""
+    behaviour = {}
+    calls = []
+    class Model:
+        def __init__(self, name):
+            self.name = name
+
+        def generate_content(self, prompt, request_options=None):
+            calls.append(self.name)
+            delay, outcome = behaviour[self.name]
+            time.sleep(delay)
+            if isinstance(outcome, GeminiError):
+                raise outcome
+            return Response(outcome)
+
+    monkeypatch.setattr(server, 'gemini_breakers', {name: CircuitBreaker(name) for name in server.GEMINI_MODELS})
+    monkeypatch.setattr(server, 'get_gemini_model', Model)
+    monkeypatch.setattr(server, 'GEMINI_HEDGING', False)
+    behaviour['calls'] = calls
+    return behaviour
+
+def test_404_opens_breaker_for_not_found_cooldown():
+    breaker = CircuitBreaker('gemini-test')
+    breaker.record(False, 0.1, 404)
+    assert breaker.state == 'open'
+    assert breaker._cooldown == server.GEMINI_NOT_FOUND_COOLDOWN
+    assert not breaker.allow()
+
+def test_breaker_opens_at_error_rate_threshold():
+    breaker = CircuitBreaker('gemini-test')
+    breaker.record(True, 0.1)
+    breaker.record(True, 0.1)
+    breaker.record(False, 0.1, 503)
+    breaker.record(False, 0.1, 503)
+    assert breaker.state == 'closed'  # Fewer than GEMINI_BREAKER_MIN_CALLS calls
+    breaker.record(False, 0.1, 503)
+    assert breaker.state == 'open'
+    assert breaker._cooldown == server.GEMINI_BREAKER_COOLDOWN
+
+def test_half_open_allows_one_trial_call():
+    breaker = CircuitBreaker('gemini-test')
+    breaker.record(False, 0.1, 404)
+    breaker._opened_at -= server.GEMINI_NOT_FOUND_COOLDOWN + 1
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    assert not breaker.allow()
+    # A call that says nothing about health frees the trial slot
+    breaker.release()
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == 'closed'
+
+def test_failed_trial_reopens_breaker():
+    breaker = CircuitBreaker('gemini-test')
+    breaker._open(429)
+    breaker._opened_at -= server.GEMINI_BREAKER_COOLDOWN + 1
+    assert breaker.allow()
+    breaker.record(False, 0.1, 429)
+    assert breaker.state == 'open'
+
+def test_blocked_content_does_not_trip_breaker(models):
+    blocked = ValueError("response.text quick accessor only works when the response contains a valid Part")
+    for name in server.GEMINI_MODELS:
+        models[name] = (0, blocked)
+    for _ in range(10):
+        with pytest.raises(ValueError):
+            server.call_gemini("prompt")
+    assert models['calls'] == [server.GEMINI_MODELS[0]] * 10
+    assert all(breaker.state == 'closed' for breaker in server.gemini_breakers.values())
+    assert server.gemini_breakers[server.GEMINI_MODELS[0]].snapshot()['recent_calls'] == 0
+
+def test_client_error_is_not_failed_over(models):
+    models[server.GEMINI_MODELS[0]] = (0, GeminiError(400))
+    with pytest.raises(GeminiError):
+        server.call_gemini("prompt")
+    assert models['calls'] == [server.GEMINI_MODELS[0]]
+
+def test_quota_error_fails_over_to_next_model(models):
+    first, second = server.GEMINI_MODELS[:2]
+    models[first] = (0, GeminiError(429))
+    models[second] = (0, "answer from second model")
+    assert server.call_gemini("prompt") == "answer from second model"
+    assert models['calls'] == [first, second]
+    assert server.gemini_breakers[first].snapshot()['error_rate'] == 1.0
+
+def test_hedged_call_returns_faster_answer(models, monkeypatch):
+    monkeypatch.setattr(server, 'GEMINI_HEDGING', True)
+    monkeypatch.setattr(server, 'GEMINI_HEDGE_DEFAULT_DELAY', 0.05)
+    first, second = server.GEMINI_MODELS[:2]
+    models[first] = (1.0, "slow answer")
+    models[second] = (0, "fast answer")
+    started = time.monotonic()
+    assert server.call_gemini("prompt") == "fast answer"
+    assert time.monotonic() - started < 0.9
+    assert models['calls'] == [first, second]
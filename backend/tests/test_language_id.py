@@ -0,0 +1,27 @@
+import pytest
+from language_id import detect_language, is_in_language
+
+@pytest.mark.parametrize('text, language', [
+    ("Мы встретимся завтра в девять часов в офисе, и он принесёт отчёт.", 'Russian'),
+    ("سنلتقي غداً في الساعة التاسعة في المكتب وسيحضر التقرير معه.", 'Arabic'),
+    ("내일 아홉 시에 사무실에서 만나요, 그가 보고서를 가져올 거예요.", 'Korean'),
+    ("Wir treffen uns morgen um neun Uhr im Büro, und er bringt den Bericht mit.", 'German'),
+    ("Precisamos de mais tempo para analisar os dados antes da apresentação.", 'Portuguese'),
+])
+def test_detects_language_reliably(text, language):
+    assert detect_language(text)[0] == language
+    assert is_in_language(text, language)
+
+@pytest.mark.parametrize('text, other', [
+    ("Ми зустрінемося завтра о дев'ятій годині в офісі, і він принесе звіт.", 'Russian'),  # Ukrainian
+    ("Ще се срещнем утре в девет часа в офиса и той ще донесе доклада.", 'Russian'),  # Bulgarian
+    ("ہم کل نو بجے دفتر میں ملیں گے اور وہ رپورٹ لے کر آئے گا۔", 'Arabic'),  # Urdu
+    ("आपण उद्या नऊ वाजता कार्यालयात भेटू आणि तो अहवाल घेऊन येईल.", 'Hindi'),  # Marathi
+    ("Ens trobarem demà a les nou a l'oficina i ell portarà l'informe amb ell.", 'Portuguese'),  # Catalan
+    ("Ens trobarem demà a les nou a l'oficina i ell portarà l'informe amb ell.", 'Spanish'),
+])
+def test_related_languages_are_not_taken_for_the_target(text, other):
+    assert not is_in_language(text, other)
+
+def test_short_text_is_unknown():
+    assert detect_language("hola") == (None, 0.0)
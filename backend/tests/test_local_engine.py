@@ -0,0 +1,47 @@
+from local_engine import restore_punctuation, extractive_summary, run_local, enhance_locally
+
+TRANSCRIPT = (
+    "so the budget review went well today we agreed to move the launch to march next year and I think "
+    "we should start hiring before then the marketing team needs two more designers and the finance lead "
+    "also wants a new contractor for the audit I know the timeline is tight but we can manage it "
+    "if we start now please send me the updated plan by friday and we will review it together next week"
+)
+
+PUNCTUATED = (
+    "So the budget review went well today. "
+    "We agreed to move the launch to march next year and I think we should start hiring before then. "
+    "The marketing team needs two more designers and the finance lead also wants a new contractor for the audit. "
+    "I know the timeline is tight. "
+    "But we can manage it if we start now. "
+    "Please send me the updated plan by Friday and we will review it together next week."
+)
+
+def test_restore_punctuation_sample_transcript():
+    assert restore_punctuation(TRANSCRIPT) == PUNCTUATED
+
+def test_no_break_after_clause_introducing_verbs():
+    text = restore_punctuation("the project is on track and I think we should tell the client about it soon")
+    assert "think." not in text
+    assert text == "The project is on track and I think we should tell the client about it soon."
+
+def test_extractive_summary_uses_whole_sentences():
+    summary = extractive_summary(TRANSCRIPT)
+    assert summary == (
+        "We agreed to move the launch to march next year and I think we should start hiring before then. "
+        "Please send me the updated plan by Friday and we will review it together next week."
+    )
+    assert "Also wants" not in summary
+
+def test_timed_pauses_take_precedence():
+    words = [
+        {'text': 'thanks', 'start': 0, 'end': 300},
+        {'text': 'everyone', 'start': 350, 'end': 800},
+        {'text': 'see', 'start': 1800, 'end': 2000},
+        {'text': 'you', 'start': 2050, 'end': 2200},
+        {'text': 'soon', 'start': 2250, 'end': 2500},
+    ]
+    assert restore_punctuation("thanks everyone see you soon", words) == "Thanks everyone. See you soon."
+
+def test_run_local_matches_inline():
+    text = "yes we can do that but I need to check with the team first okay"
+    assert run_local(enhance_locally, text, "structure") == enhance_locally(text, "structure")
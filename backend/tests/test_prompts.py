@@ -0,0 +1,32 @@
+import pytest
+from prompts import compact_transcript, build_prompt
+
+@pytest.mark.parametrize('text', [
+    "Wir treffen uns morgen um neun Uhr im Büro, und er bringt den Bericht mit.",
+    "Eu comprei um carro novo ontem e estou muito feliz com ele.",
+    "Nous nous sommes vus hier soir au restaurant près de la gare.",
+])
+def test_non_english_text_is_not_compacted(text):
+    assert compact_transcript(text) == text
+
+def test_short_text_is_not_compacted():
+    assert compact_transcript("um er") == "um er"
+
+def test_english_fillers_and_stutters_are_removed():
+    text = "um so I I think we should uh go to the the store, you know, and buy some milk"
+    assert compact_transcript(text) == "so I think we should go to the store, and buy some milk"
+
+def test_repeated_phrases_are_collapsed():
+    text = "I think I think we need to leave now before it gets dark outside"
+    assert compact_transcript(text) == "I think we need to leave now before it gets dark outside"
+
+@pytest.mark.parametrize('text', [
+    "that was very very good, thank you so much and bye bye everyone see you tomorrow",
+    "no no, I know that that works because we had had this problem before",
+    "the score was two two at half time and we were really really happy about it",
+])
+def test_deliberate_repeats_are_kept(text):
+    assert compact_transcript(text) == text
+
+def test_short_input_gets_short_template():
+    assert build_prompt('summary', 'hi there').startswith("Summarize in 2-3 sentences:")
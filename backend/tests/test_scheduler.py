@@ -0,0 +1,139 @@
+import io
+import threading
+import time
+import pytest
+import app as server
+from app import GeminiScheduler, GeminiBusyError, GEMINI_PRIORITY_WEIGHTS
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """A scheduler whose next slot is a long way off, so every acquire queues"""
+    scheduler = GeminiScheduler(5, GEMINI_PRIORITY_WEIGHTS)
+    scheduler.acquire('batch')
+    monkeypatch.setattr(server, 'gemini_scheduler', scheduler)
+    return scheduler
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, 'GEMINI_API_KEY', 'test-key')
+    monkeypatch.setattr(server, 'LOCAL_FIRST', False)
+    monkeypatch.setattr(server, 'call_gemini', lambda prompt: "Gemini answer")
+    return server.app.test_client()
+
+def wait_for_depth(scheduler, priority, depth):
+    for _ in range(200):
+        if scheduler.queue_depths()[priority] >= depth:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"{priority} queue never reached {depth}")
+
+def test_live_call_is_served_before_queued_batch_call():
+    scheduler = GeminiScheduler(0.2, GEMINI_PRIORITY_WEIGHTS)
+    scheduler.acquire('batch')
+    order = []
+    batch = threading.Thread(target=lambda: (scheduler.acquire('batch'), order.append('batch')))
+    live = threading.Thread(target=lambda: (scheduler.acquire('live'), order.append('live')))
+    batch.start()
+    wait_for_depth(scheduler, 'batch', 1)
+    live.start()
+    wait_for_depth(scheduler, 'live', 1)
+    batch.join(5)
+    live.join(5)
+    assert order == ['live', 'batch']
+
+def test_superseded_live_update_is_dropped():
+    scheduler = GeminiScheduler(5, GEMINI_PRIORITY_WEIGHTS)
+    scheduler.acquire('live')
+    first = scheduler.start_session_update('page-1')
+    errors = []
+    def queued_update():
+        try:
+            scheduler.acquire('live', time.monotonic() + 5, first)
+        except GeminiBusyError as e:
+            errors.append(e)
+    thread = threading.Thread(target=queued_update)
+    thread.start()
+    wait_for_depth(scheduler, 'live', 1)
+    scheduler.start_session_update('page-1')
+    thread.join(5)
+    assert errors and errors[0].status_code == 409
+    assert 'superseded' in str(errors[0])
+
+def test_quiet_sessions_are_forgotten(monkeypatch):
+    scheduler = GeminiScheduler(0, GEMINI_PRIORITY_WEIGHTS)
+    scheduler.start_session_update('old-page')
+    monkeypatch.setattr(server, 'LIVE_SESSION_TTL', 0)
+    time.sleep(0.01)
+    scheduler.start_session_update('new-page')
+    assert scheduler.session_count() == 1
+
+def test_expired_live_update_returns_409(client, scheduler):
+    response = client.post('/translate-text', json={
+        'text': 'We will meet tomorrow at nine in the office.',
+        'target_language': 'Spanish',
+        'deadline_ms': 100
+    })
+    assert response.status_code == 409
+    assert response.get_json()['stale'] is True
+
+def test_deep_queue_returns_429_with_retry_after(client, monkeypatch):
+    monkeypatch.setitem(server.GEMINI_MAX_QUEUE_DEPTH, 'interactive', 0)
+    response = client.post('/enhance-text', json={'text': 'hello there'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+
+@pytest.mark.parametrize('deadline_ms', ['soon', -5, True, float('inf')])
+def test_bad_deadline_returns_400(client, deadline_ms):
+    response = client.post('/translate-text', json={
+        'text': 'Hola amigo', 'target_language': 'German', 'deadline_ms': deadline_ms
+    })
+    assert response.status_code == 400
+
+def test_transcribe_returns_transcript_when_admission_fails(client, monkeypatch):
+    monkeypatch.setattr(server, 'upload_file_to_assemblyai', lambda path: 'https://upload')
+    monkeypatch.setattr(server, 'transcribe_audio', lambda url: {
+        'success': True, 'transcript': 'hello there friend', 'words': []
+    })
+    monkeypatch.setitem(server.GEMINI_MAX_QUEUE_DEPTH, 'batch', 0)
+    response = client.post('/transcribe', data={
+        'file': (io.BytesIO(b'audio'), 'clip.mp3'), 'enhance': 'true', 'target_language': 'German'
+    }, content_type='multipart/form-data')
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['transcript'] == 'hello there friend'
+    assert 'Server busy' in data['translation_error'] and 'Server busy' in data['enhancement_error']
+    assert 'structured_text' not in data
+    assert int(response.headers['Retry-After']) > 0
+
+def test_live_request_does_not_wait_behind_batch_call(client, scheduler):
+    # A batch call for the same text is queued; the live request must not coalesce with it
+    batch = threading.Thread(target=lambda: server.coalesce_gemini_call(
+        ('summarize', 'same text'), lambda: (server.gemini_scheduler.acquire('batch'), 'batch')[1]
+    ))
+    batch.start()
+    wait_for_depth(scheduler, 'batch', 1)
+    with server.app.test_request_context():
+        server.g.gemini_priority = 'live'
+        server.g.gemini_deadline = time.monotonic() + 0.2
+        server.g.gemini_session = None
+        assert server.coalesce_gemini_call(('summarize', 'same text'), lambda: 'live') == 'live'
+    scheduler._next_slot = 0
+    with scheduler._cond:
+        scheduler._cond.notify_all()
+    batch.join(5)
+
+def test_local_first_work_skips_admission(client, scheduler, monkeypatch):
+    monkeypatch.setattr(server, 'LOCAL_FIRST', True)
+    monkeypatch.setattr(server, 'run_local', lambda fn, *args: fn(*args))
+    monkeypatch.setitem(server.GEMINI_MAX_QUEUE_DEPTH, 'live', 0)
+    monkeypatch.setitem(server.GEMINI_MAX_QUEUE_DEPTH, 'interactive', 0)
+    assert client.post('/enhance-text', json={'text': 'hello there how are you'}).status_code == 200
+    assert client.post('/summarize-text', json={'text': 'hello there how are you'}).status_code == 200
+    response = client.post('/process-live-text', json={
+        'text': 'hello there how are you', 'session_id': 'page-1', 'deadline_ms': 1
+    })
+    assert response.status_code == 200
+    assert response.get_json()['structured_text'] == 'Hello there how are you.'
+    # Translation still goes to Gemini, so it is still admitted against the queue
+    response = client.post('/process-live-text', json={'text': 'hello there', 'target_language': 'German'})
+    assert response.status_code == 429
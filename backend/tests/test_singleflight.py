@@ -0,0 +1,98 @@
+import threading
+import time
+import pytest
+import app as server
+from app import SingleFlight, GeminiBusyError
+
+def wait_for_waiters(flight, key, count):
+    """Block until count followers are waiting on the call for key"""
+    for _ in range(200):
+        with flight._lock:
+            call = flight._calls.get(key)
+            if call is not None and call.waiters >= count:
+                return
+        time.sleep(0.01)
+    raise AssertionError(f"{count} followers never joined")
+
+def run_in_threads(count, target):
+    results = [None] * count
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+def test_concurrent_identical_calls_make_one_upstream_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    def upstream():
+        calls.append(1)
+        release.wait(5)
+        return {'success': True, 'text': 'done'}
+
+    threads, results = run_in_threads(4, lambda: flight.do('key', upstream, timeout=5))
+    wait_for_waiters(flight, 'key', 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert flight.coalesced == 3
+    assert all(result == {'success': True, 'text': 'done'} for result in results)
+    # Every caller gets its own copy
+    assert len({id(result) for result in results}) == 4
+
+def test_leader_exception_reaches_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+    def upstream():
+        release.wait(5)
+        raise RuntimeError("upstream failed")
+
+    threads, results = run_in_threads(3, lambda: flight.do('key', upstream, timeout=5))
+    wait_for_waiters(flight, 'key', 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(result, RuntimeError) and str(result) == "upstream failed" for result in results)
+
+def test_follower_timeout_becomes_error_result(monkeypatch):
+    flight = SingleFlight()
+    monkeypatch.setattr(server, 'gemini_singleflight', flight)
+    monkeypatch.setattr(server, 'GEMINI_SINGLEFLIGHT_TIMEOUT', 0.1)
+    release = threading.Event()
+    # Outside a request, calls coalesce in the interactive class
+    key = ('interactive', 'summarize', 'text')
+    leader, _ = run_in_threads(1, lambda: flight.do(key, lambda: release.wait(5)))
+    wait_for_waiters(flight, key, 0)
+
+    result = server.coalesce_gemini_call(('summarize', 'text'), lambda: pytest.fail("follower must not call upstream"))
+    release.set()
+    leader[0].join()
+
+    assert result['success'] is False
+    assert 'Timed out' in result['error']
+
+def test_follower_retries_after_leader_is_rejected():
+    flight = SingleFlight()
+    release = threading.Event()
+    def leader_call():
+        release.wait(5)
+        raise GeminiBusyError('Live update superseded by a newer update from the same session', status_code=409)
+
+    leader, leader_result = run_in_threads(1, lambda: flight.do('key', leader_call, timeout=5))
+    wait_for_waiters(flight, 'key', 0)
+    follower, follower_result = run_in_threads(1, lambda: flight.do('key', lambda: 'follower answer', timeout=5))
+    wait_for_waiters(flight, 'key', 1)
+    release.set()
+    leader[0].join()
+    follower[0].join()
+
+    assert isinstance(leader_result[0], GeminiBusyError)
+    assert follower_result[0] == 'follower answer'
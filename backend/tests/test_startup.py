@@ -0,0 +1,30 @@
+import subprocess
+import sys
+import os
+import app as server
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_import_does_not_load_heavy_libraries():
+    code = (
+        "import sys, app; "
+        "print(','.join(m for m in ('numpy', 'google.generativeai', 'requests') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ''
+
+def test_ready_only_after_warmup(monkeypatch):
+    monkeypatch.setattr(server, 'GEMINI_API_KEY', None)
+    monkeypatch.setattr(server, 'ASSEMBLYAI_API_KEY', None)
+    monkeypatch.setattr(server, 'run_local', lambda fn, *args: fn(*args))
+    server.app_ready.clear()
+    client = server.app.test_client()
+
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'warming up'
+
+    server.warmup()
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['startup']['warmup_seconds'] is not None
@@ -0,0 +1,40 @@
+import pytest
+from translation_memory import TranslationMemory, split_segments
+
+SOURCE = "Please send the quarterly sales report to Alice in the finance department before Friday."
+
+@pytest.fixture
+def memory():
+    memory = TranslationMemory()
+    memory.store(SOURCE, "translated", "Spanish")
+    return memory
+
+def test_same_sentence_is_reused_ignoring_case_spacing_and_punctuation(memory):
+    assert memory.lookup("please send the quarterly sales report to Alice in the finance  department, before Friday", "Spanish") == "translated"
+
+@pytest.mark.parametrize('changed', [
+    SOURCE.replace("Alice", "Maria"),
+    SOURCE.replace("Please send", "Please delete"),
+    SOURCE.replace("Please send", "Please do not send"),
+    SOURCE.replace("Friday", "Monday"),
+])
+def test_changed_sentence_is_not_reused(memory, changed):
+    assert memory.lookup(changed, "Spanish") is None
+
+def test_changed_sentence_gets_a_reference(memory):
+    assert memory.similar(SOURCE.replace("Alice", "Maria"), "Spanish") == (SOURCE, "translated")
+    assert memory.similar("Completely unrelated words about the weather in the mountains.", "Spanish") is None
+
+def test_memory_is_per_language(memory):
+    assert memory.lookup(SOURCE, "French") is None
+
+def test_split_keeps_decimals_and_abbreviations():
+    text = "Smith paid $3.50 for lunch, e.g. a sandwich. Dr. Jones paid the rest. Done?\nYes"
+    segments = split_segments(text)
+    assert segments == [
+        "Smith paid $3.50 for lunch, e.g. a sandwich. ",
+        "Dr. Jones paid the rest. ",
+        "Done?\n",
+        "Yes"
+    ]
+    assert ''.join(segments) == text
@@ -0,0 +1,208 @@
+import re
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict
+
+# MinHash / LSH parameters for finding similar earlier sentences
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 4
+REFERENCE_THRESHOLD = 0.7  # Estimated Jaccard similarity for an earlier translation to serve as a reference
+FUZZY_MIN_CHARS = 20  # Shorter segments only match exactly
+
+_PRIME = (1 << 31) - 1
+_hash_params = None  # NumPy and the permutation parameters are loaded on first use
+
+BOUNDARY_RE = re.compile(r'(?:[.!?]+|\n)\s*')
+PUNCTUATION_RE = re.compile(r"[^\w\s']", re.UNICODE)
+# A period after these doesn't end the sentence
+ABBREVIATIONS = {
+    'e.g', 'i.e', 'etc', 'vs', 'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'approx', 'dept',
+    'inc', 'ltd', 'co', 'corp', 'fig', 'a.m', 'p.m', 'u.s', 'u.k', 'z.b', 'bzw', 'usw', 'sra'
+}
+
+def _boundary_allowed(text, match):
+    """Whether a punctuation match really ends a sentence"""
+    if match.group(0).startswith('\n'):
+        return True
+    end = match.end()
+    # "$3.50", "example.com" and the inner period of "e.g." are followed directly by text
+    if end < len(text) and not match.group(0)[-1].isspace():
+        return False
+    if match.group(0).rstrip() != '.':
+        return True
+    words = text[:match.start()].split()
+    previous = words[-1].lstrip('("\'').lower() if words else ''
+    # Abbreviations and initials ("J. Smith")
+    return previous not in ABBREVIATIONS and not (len(previous) == 1 and previous.isalpha())
+
+def split_segments(text):
+    """Split text into sentence segments, each keeping its trailing whitespace so they rejoin exactly"""
+    segments = []
+    start = 0
+    for match in BOUNDARY_RE.finditer(text):
+        # Whitespace-only pieces are kept with the following segment
+        if _boundary_allowed(text, match) and text[start:match.start()].strip():
+            segments.append(text[start:match.end()])
+            start = match.end()
+    if text[start:].strip() or not segments:
+        segments.append(text[start:])
+    elif start < len(text):
+        segments[-1] += text[start:]
+    return segments
+
+def join_segments(segments, translations):
+    """Reassemble translated segments using the original segments' trailing whitespace"""
+    return ''.join(
+        translation.strip() + segment[len(segment.rstrip()):]
+        for segment, translation in zip(segments, translations)
+    ).strip()
+
+NUMBERED_LINE_RE = re.compile(r'^\s*(\d+)[.)]\s*(.*)$')
+
+def parse_numbered_segments(response_text, count):
+    """Parse a "1. ..." numbered model response back into a list of segments, or None if it doesn't line up"""
+    parsed = {}
+    current = None
+    for line in response_text.splitlines():
+        match = NUMBERED_LINE_RE.match(line)
+        if match and 1 <= int(match.group(1)) <= count and int(match.group(1)) not in parsed:
+            current = int(match.group(1))
+            parsed[current] = match.group(2).strip()
+        elif current is not None and line.strip():
+            parsed[current] = f"{parsed[current]} {line.strip()}"
+    if len(parsed) != count or not all(parsed.values()):
+        return None
+    return [parsed[number] for number in range(1, count + 1)]
+
+def _normalized(segment):
+    """Lowercase text without punctuation and with single spaces"""
+    return ' '.join(PUNCTUATION_RE.sub(' ', segment.lower()).split())
+
+def _exact_key(segment):
+    return hashlib.sha1(_normalized(segment).encode('utf-8')).hexdigest()
+
+def _minhash_params():
+    global _hash_params
+    if _hash_params is None:
+        import numpy as np
+        rng = np.random.default_rng(20240601)
+        _hash_params = (
+            np,
+            rng.integers(1, _PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64),
+            rng.integers(0, _PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+        )
+    return _hash_params
+
+def _minhash(text):
+    np, hash_a, hash_b = _minhash_params()
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(len(text) - SHINGLE_SIZE + 1, 1))}
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') % _PRIME for s in shingles],
+        dtype=np.uint64
+    )
+    # (a * x + b) mod p for every permutation at once; operands stay below 2^31 so nothing overflows
+    return ((hashes[:, None] * hash_a[None, :] + hash_b[None, :]) % _PRIME).min(axis=0)
+
+def _bands(signature):
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(LSH_BANDS)]
+
+class TranslationMemory:
+    """Per-language store of sentence translations.
+
+    A stored translation is only reused for the same sentence (ignoring case, whitespace and
+    punctuation). Similar sentences found through MinHash are only offered as references for
+    the model: a changed name, verb or amount makes them mean something else.
+    """
+
+    class _Entry:
+        def __init__(self, source, translation, signature):
+            self.source = source
+            self.translation = translation
+            self.signature = signature
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = defaultdict(OrderedDict)  # language -> exact key -> entry (LRU order)
+        self._buckets = defaultdict(lambda: defaultdict(set))  # language -> band -> exact keys
+        self.stats = {'exact_hits': 0, 'references': 0, 'misses': 0, 'evictions': 0}
+
+    def lookup(self, segment, language):
+        """Return the stored translation of this exact sentence, or None"""
+        language = language.lower()
+        key = _exact_key(segment)
+        with self._lock:
+            entries = self._entries[language]
+            entry = entries.get(key)
+            if entry is not None:
+                entries.move_to_end(key)
+                self.stats['exact_hits'] += 1
+                return entry.translation
+            self.stats['misses'] += 1
+            return None
+
+    def similar(self, segment, language):
+        """Return (source, translation) of the most similar stored sentence, or None"""
+        language = language.lower()
+        normalized = _normalized(segment)
+        if len(normalized) < FUZZY_MIN_CHARS:
+            return None
+
+        signature = _minhash(normalized)
+        with self._lock:
+            entries = self._entries[language]
+            candidates = set()
+            for band in _bands(signature):
+                candidates |= self._buckets[language].get(band, set())
+
+            best, best_score = None, 0.0
+            for candidate in candidates:
+                entry = entries.get(candidate)
+                if entry is None:
+                    continue
+                score = float((entry.signature == signature).mean())
+                if score > best_score:
+                    best, best_score = entry, score
+
+            if best is None or best_score < REFERENCE_THRESHOLD:
+                return None
+            self.stats['references'] += 1
+            return best.source, best.translation
+
+    def store(self, segment, translation, language):
+        """Add an accepted translation, evicting the least recently used entries when full"""
+        language = language.lower()
+        key = _exact_key(segment)
+        normalized = _normalized(segment)
+        signature = _minhash(normalized) if len(normalized) >= FUZZY_MIN_CHARS else None
+
+        with self._lock:
+            entries = self._entries[language]
+            if key in entries:
+                self._unindex(language, key, entries.pop(key))
+            entries[key] = TranslationMemory._Entry(segment, translation, signature)
+            if signature is not None:
+                for band in _bands(signature):
+                    self._buckets[language][band].add(key)
+
+            while len(entries) > self.max_entries:
+                old_key, old_entry = entries.popitem(last=False)
+                self._unindex(language, old_key, old_entry)
+                self.stats['evictions'] += 1
+
+    def _unindex(self, language, key, entry):
+        if entry.signature is None:
+            return
+        buckets = self._buckets[language]
+        for band in _bands(entry.signature):
+            bucket = buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[band]
+
+    def size(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
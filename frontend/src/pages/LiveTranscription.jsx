@@ -19,6 +19,11 @@ const LiveTranscription = () => {
   const audioContextRef = useRef(null);
   const analyserRef = useRef(null);
   const streamRef = useRef(null);
+  const sessionIdRef = useRef(
+    typeof crypto !== "undefined" && crypto.randomUUID
+      ? crypto.randomUUID()
+      : Math.random().toString(36).slice(2)
+  );
 
   // --- Languages ---
   const languages = [
@@ -166,6 +171,7 @@ const LiveTranscription = () => {
         body: JSON.stringify({
           text: transcript,
           target_language: targetLanguage,
+          session_id: sessionIdRef.current,
         }),
       });
 
@@ -201,6 +207,8 @@ const LiveTranscription = () => {
         body: JSON.stringify({
           text: textToEnhance,
           target_language: targetLanguage,
+          session_id: sessionIdRef.current,
+          fields: "structured_text,expressive_text,summary",
         }),
       });
 
@@ -137,7 +137,9 @@ const PreRecorded = () => {
         },
         body: JSON.stringify({ 
           text: textToEnhance,
-          target_language: targetLanguage 
+          target_language: targetLanguage,
+          priority: 'interactive',
+          fields: 'structured_text,expressive_text,summary'
         }),
       });
 
@@ -177,7 +179,8 @@ const PreRecorded = () => {
         },
         body: JSON.stringify({ 
           text: transcript,
-          target_language: targetLanguage 
+          target_language: targetLanguage,
+          priority: 'interactive'
         }),
       });
 